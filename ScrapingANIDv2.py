@@ -1,474 +1,864 @@
 import time
+from collections import deque
 from datetime import datetime
-import pandas as pd
-import os
 import sys
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import argparse
+import atexit
+import json
+from functools import partial
 from urllib.parse import urljoin
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from anid_utils import safe_print, configure_stdout
+from anid_writer import ArticleWriter
+from anid_state import StateStore
+from anid_metrics import metrics, MetricsReporter
 
-# Configuración de encoding para Windows
-sys.stdout.reconfigure(encoding='utf-8')
+configure_stdout()
 
-def safe_print(text):
-    try:
-        print(text)
-    except UnicodeEncodeError:
-        print(text.encode('ascii', errors='replace').decode('ascii'))
+# Argumentos de ejecución
+parser = argparse.ArgumentParser(description="Extracción de metadata de artículos del repositorio ANID")
+parser.add_argument("--mode", choices=["selenium", "api", "oai", "refresh"], default="selenium",
+                    help="Motor de extracción: navegador (selenium), API REST de DSpace (api), cosecha incremental OAI-PMH (oai) "
+                         "o refresco de los artículos ya guardados que cambiaron en el repositorio (refresh)")
+parser.add_argument("--base-url", default="https://repositorio.anid.cl",
+                    help="URL base del repositorio (permite apuntar a un servidor local de pruebas)")
+parser.add_argument("--api-page-size", type=int, default=100,
+                    help="Cantidad de resultados por página en el modo api")
+parser.add_argument("--fanout", action="store_true",
+                    help="Modo api: una búsqueda por alias de la afiliación, en paralelo, combinadas sin duplicados")
+parser.add_argument("--query-terms", default=None,
+                    help="Alias separados por coma para --fanout (por defecto, las frases entre comillas de la búsqueda)")
+parser.add_argument("--dedup-file", default="fanout_index.db",
+                    help="Índice en disco de ítems vistos por --fanout (se recrea en cada ejecución)")
+parser.add_argument("--dedup-capacity", type=int, default=1_000_000,
+                    help="Ítems previstos para dimensionar el filtro de Bloom del índice de --fanout")
+parser.add_argument("--refresh-workers", type=int, default=8,
+                    help="Modo refresh: consultas simultáneas a la API para revisar los ítems guardados")
+parser.add_argument("--extraction", choices=["dom", "js"], default="dom",
+                    help="Extracción por elementos de WebDriver (dom) o en una sola llamada de JavaScript (js)")
+parser.add_argument("--profile", choices=["normal", "lean"], default="normal",
+                    help="Perfil del navegador: normal o lean (carga 'eager', sin imágenes, fuentes ni terceros)")
+parser.add_argument("--chromedriver", default=None,
+                    help="Ruta a chromedriver. Sin ella se usa la guardada en chromedriver_path.txt, "
+                         "o se resuelve con webdriver_manager (con red) solo la primera vez")
+parser.add_argument("--warm-browser", action="store_true",
+                    help="Conectarse a los navegadores ya abiertos por anid_browser_daemon.py en vez de iniciar Chrome")
+parser.add_argument("--daemon-file", default="browser_daemon.json",
+                    help="Archivo con las direcciones de los navegadores del daemon")
+parser.add_argument("--chrome-cache-dir", default="chrome_cache",
+                    help="Directorio de caché en disco de Chrome que se reutiliza entre ejecuciones (perfil lean)")
+parser.add_argument("--oai-prefix", choices=["dim", "oai_dc"], default="dim",
+                    help="Formato de metadata OAI-PMH (dim trae las mismas claves dc.* que la tabla de metadata)")
+parser.add_argument("--oai-from", default=None,
+                    help="Fecha inicial de la cosecha OAI (por defecto, la fecha de la última cosecha exitosa)")
+parser.add_argument("--oai-until", default=None,
+                    help="Fecha final de la cosecha OAI (por defecto, ahora)")
+parser.add_argument("--oai-set", default=None,
+                    help="Set OAI opcional para acotar la cosecha")
+parser.add_argument("--snapshots", action="store_true",
+                    help="Guardar el HTML renderizado (o el JSON de la API) de cada artículo para re-derivarlo sin red")
+parser.add_argument("--snapshot-dir", default="snapshots",
+                    help="Directorio del almacén de snapshots (ver anid_reparse.py)")
+parser.add_argument("--cache", action="store_true",
+                    help="Usar la caché en disco de búsquedas e ítems (persiste entre ejecuciones)")
+parser.add_argument("--cache-file", default="http_cache.db", help="Archivo SQLite de la caché")
+parser.add_argument("--cache-max-mb", type=int, default=512, help="Tamaño máximo de la caché (desalojo LRU)")
+parser.add_argument("--cache-ttl-search", type=int, default=3600, help="TTL en segundos de los listados de búsqueda")
+parser.add_argument("--cache-ttl-item", type=int, default=86400, help="TTL en segundos de los ítems")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Cantidad de navegadores Chrome que extraen artículos en paralelo (modo selenium)")
+parser.add_argument("--rpp", type=int, default=100,
+                    help="Resultados por página de búsqueda (spc.rpp de DSpace)")
+parser.add_argument("--listing-workers", type=int, default=0,
+                    help="Navegadores que recorren páginas de búsqueda por delante de la extracción (0 = en el hilo "
+                         "principal). Con --workers mayor que 1, uno de ellos es el navegador principal")
+parser.add_argument("--compact-every", type=int, default=20,
+                    help="Cada cuántos batches se regenera el CSV consolidado (0 = solo al final)")
+parser.add_argument("--parquet", action="store_true",
+                    help="Generar también articles_data.parquet al compactar (requiere pandas y pyarrow)")
+parser.add_argument("--max-attempts", type=int, default=3,
+                    help="Intentos máximos por URL al reprocesar enlaces con error o incompletos")
+parser.add_argument("--retry-base-delay", type=float, default=5.0,
+                    help="Espera base (segundos) antes de reintentar un enlace con error; se duplica en cada intento")
+parser.add_argument("--retry-max-delay", type=float, default=300.0,
+                    help="Espera máxima entre reintentos de un enlace")
+parser.add_argument("--breaker-threshold", type=float, default=0.5,
+                    help="Tasa de errores de las últimas --breaker-window extracciones que pausa todas las aperturas")
+parser.add_argument("--breaker-window", type=int, default=20,
+                    help="Cantidad de extracciones recientes que considera el corte de circuito")
+parser.add_argument("--breaker-cooldown", type=float, default=60.0,
+                    help="Segundos de pausa al abrirse el circuito (se duplica si la prueba posterior falla)")
+parser.add_argument("--min-interval", type=float, default=0.0,
+                    help="Segundos mínimos entre aperturas de artículos, compartido por todos los workers")
+parser.add_argument("--queue-db", default=None,
+                    help="Cola de trabajo compartida (SQLite) para repartir el recorrido entre varios procesos o máquinas")
+parser.add_argument("--role", choices=["coordinator", "worker"], default="worker",
+                    help="Con --queue-db: sembrar la cola e incorporar los resultados (coordinator) o procesar unidades (worker)")
+parser.add_argument("--queue-window", type=int, default=8,
+                    help="Páginas de búsqueda en curso a la vez en la cola compartida")
+parser.add_argument("--lease-seconds", type=int, default=120,
+                    help="Duración del arriendo de una unidad de trabajo; se renueva con un latido mientras el worker vive")
+parser.add_argument("--worker-id", default=None,
+                    help="Identificador del worker en la cola (por defecto, host-pid)")
+parser.add_argument("--metrics-file", default="metrics.jsonl",
+                    help="Archivo donde se anexa una línea JSON con las métricas de la ejecución (vacío = desactivado)")
+parser.add_argument("--metrics-interval", type=float, default=30,
+                    help="Segundos entre líneas del archivo de métricas")
+parser.add_argument("--metrics-port", type=int, default=None,
+                    help="Puerto local donde servir /metrics en formato Prometheus durante la ejecución")
+args = parser.parse_args()
+if args.queue_db and args.mode != "selenium":
+    parser.error("--queue-db solo funciona con --mode selenium")
 
-# Archivos de checkpoint y errores
+# Archivos de datos y de estado (checkpoint_page.txt y error_links.txt solo se leen para migrar a la base de estado)
 CHECKPOINT_PAGE_FILE = "checkpoint_page.txt"
 CSV_FILE = "articles_data.csv"
 ERROR_FILE = "error_links.txt"
+STATE_DB_FILE = "scraper_state.db"
 
-# Función para guardar el batch en CSV (fusionando con datos previos)
-def save_batch(data_batch, csv_file):
-    df_new = pd.DataFrame(data_batch)
-    if os.path.exists(csv_file):
-        df_existing = pd.read_csv(csv_file, encoding="utf-8-sig")
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-    else:
-        df_combined = df_new
-    df_combined.to_csv(csv_file, index=False, encoding="utf-8-sig")
-    safe_print(f"📁 Guardado intermedio: {len(df_combined)} registros en '{csv_file}'")
-    return df_combined
+# URL base y parámetros de búsqueda
+base_url = args.base_url.rstrip("/")
+search_url = base_url + '/search?query="universidad%20de%20la%20frontera"%20OR%20"university%20of%20the%20frontier"%20OR%20"university%20of%20la%20frontera"%20OR%20"university%20of%20frontier"%20OR%20"frontier%20university"%20OR%20"univ%20la%20frontera"'
+
+batch_size = 50  # Guardar cada 50 artículos
+QUEUE_POLL_SECONDS = 10  # Espera entre consultas a la cola compartida cuando no hay unidades libres
+
+# Con la cola compartida, los workers no abren el journal ni la base de estado: sus resultados quedan
+# en la cola y solo el coordinador los anexa (abrir el journal lo recorta a lo último confirmado)
+queue_worker = bool(args.queue_db) and args.role == "worker"
+writer = state = None
+if not queue_worker:
+    # Escritor de solo-anexado: cada batch se anexa al journal y el CSV consolidado se regenera periódicamente
+    writer = ArticleWriter(CSV_FILE, compact_every=args.compact_every, parquet=args.parquet)
+
+    # Estado de la ejecución (URLs, intentos y checkpoint) en SQLite, sincronizado con el journal
+    state = StateStore(STATE_DB_FILE)
+    state.sync_with_journal(writer, CHECKPOINT_PAGE_FILE, ERROR_FILE)
+
+# Métricas de la ejecución: líneas JSON periódicas y endpoint Prometheus opcional
+metrics_reporter = MetricsReporter(args.metrics_file, interval=args.metrics_interval, port=args.metrics_port)
+atexit.register(metrics_reporter.close)
+
+# Página de búsqueda ya terminada cuyos artículos siguen en el batch sin guardar: su checkpoint se
+# escribe en la misma transacción que ese batch
+pending_checkpoint = None
+
+# Función para guardar el batch (anexándolo al journal y registrándolo en la base de estado)
+def save_batch(data_batch):
+    global pending_checkpoint
+    writer.append(data_batch)
+    state.record_batch(data_batch, writer.committed_bytes, checkpoint_page=pending_checkpoint)
+    metrics.incr("articles", len(data_batch))
+    safe_print(f"📁 Guardado intermedio: {len(data_batch)} registros anexados a '{writer.journal_file}'")
+    if pending_checkpoint is not None:
+        safe_print(f"✅ Checkpoint página actualizado a: {pending_checkpoint}")
+        pending_checkpoint = None
 
 # Funciones de checkpoint para página
 def load_checkpoint_page():
-    if os.path.exists(CHECKPOINT_PAGE_FILE):
-        with open(CHECKPOINT_PAGE_FILE, "r", encoding="utf-8") as f:
-            try:
-                page = int(f.read().strip())
-                safe_print(f"✅ Checkpoint página cargado: {page}")
-                return page
-            except:
-                safe_print("⚠️ Error leyendo checkpoint de página. Iniciando desde la página 1.")
-                return 1
-    return 1
+    page = state.load_checkpoint_page()
+    safe_print(f"✅ Checkpoint página cargado: {page}")
+    return page
 
 def update_checkpoint_page(page):
-    with open(CHECKPOINT_PAGE_FILE, "w", encoding="utf-8") as f:
-        f.write(str(page))
+    state.update_checkpoint_page(page)
     safe_print(f"✅ Checkpoint página actualizado a: {page}")
 
-def load_error_links():
-    """Carga todos los enlaces registrados en error_links.txt sin borrarlos."""
-    if os.path.exists(ERROR_FILE):
-        with open(ERROR_FILE, "r", encoding="utf-8") as f:
-            return [line.strip() for line in f if line.strip()]
-    return []
-
-def get_incomplete_error_links(csv_file, error_links):
-    """Verifica en el CSV si los enlaces de error existen y están incompletos (por ejemplo, falta dc.date o dc.title).
-       Devuelve la lista de enlaces a reprocesar."""
-    to_reprocess = []
-    if os.path.exists(csv_file):
-        df = pd.read_csv(csv_file, encoding="utf-8-sig")
-        for link in error_links:
-            # Si no existe el link en el CSV, se reprocesa
-            if link not in df["URL"].tolist():
-                to_reprocess.append(link)
-            else:
-                # Si existe pero el campo 'dc.date' o 'dc.title' está vacío, se reprocesa
-                record = df[df["URL"] == link].iloc[0]
-                if not record.get("dc.title") or not record.get("dc.date"):
-                    to_reprocess.append(link)
+def log_error_link(link, error=""):
+    """Registra en la base de estado un enlace que no se pudo procesar."""
+    state.mark_failed(link, error)
+    metrics.incr("errors")
+
+def load_existing_articles():
+    """Devuelve la cantidad de artículos guardados (el mayor article_id registrado)."""
+    count = state.max_article_id()
+    if count:
+        safe_print(f"📁 CSV existente: {count} artículos previamente guardados.")
     else:
-        # Si no existe CSV, reprocesar todos los enlaces de error
-        to_reprocess = error_links
-    return list(set(to_reprocess))  # Eliminar duplicados
-
-# Reprocesamiento de enlaces con error
-error_links = load_error_links()
-links_to_reprocess = get_incomplete_error_links(CSV_FILE, error_links)
-if links_to_reprocess:
-    safe_print(f"🔄 Se encontraron {len(links_to_reprocess)} enlaces de error para reprocesar.")
-    for link in links_to_reprocess:
-        try:
-            driver.get(link)
-            safe_print(f"🔍 Reprocesando artículo: {link}")
-            time.sleep(3)
-            try:
-                full_page_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Página completa del artículo')]"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", full_page_button)
-                driver.execute_script("arguments[0].click();", full_page_button)
-                wait.until(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'metadata-table')]")))
-                safe_print("✔ Botón 'Página completa' clickeado en reprocesamiento.")
-            except TimeoutException:
-                safe_print("⚠ No se encontró el botón 'Página completa' en reprocesamiento. Extrayendo metadata directamente.")
-                time.sleep(2)
-            
-            # Extraer metadata similar a la función principal
-            article_data = {
-                "article_id": None,  # Se asignará luego
-                "URL": link,
-                "dc.contributor": [],
-                "dc.creator": "",
-                "dc.date": "",
-                "dc.description.abstract": ""
-            }
-            try:
-                article_data["dc.title"] = driver.find_element(By.CSS_SELECTOR, "h2.heading").text.strip()
-            except Exception:
-                article_data["dc.title"] = ""
-            try:
-                autores = driver.find_elements(By.CSS_SELECTOR, "div.authority span")
-                if autores:
-                    article_data["dc.creator"] = autores[0].text.strip()
-                    for autor in autores:
-                        article_data["dc.contributor"].append(autor.text.strip())
-            except Exception:
-                article_data["dc.creator"] = ""
-            try:
-                article_data["dc.date"] = driver.find_element(By.CSS_SELECTOR, "div.date").text.strip()
-            except Exception:
-                article_data["dc.date"] = ""
-            try:
-                article_data["dc.description.abstract"] = driver.find_element(By.CSS_SELECTOR, "div.abstract-text").text.strip()[:500]
-            except Exception:
-                article_data["dc.description.abstract"] = ""
+        safe_print("📁 No se encontró CSV existente. Iniciando desde cero.")
+    return count
+
+# Almacén de snapshots opcional (HTML o JSON crudo de cada artículo)
+snapshots = None
+if args.snapshots:
+    from anid_snapshots import SnapshotStore
+    snapshots = SnapshotStore(args.snapshot_dir)
+
+# Caché en disco opcional de búsquedas e ítems, con TTL por recurso y desalojo LRU
+cache = None
+if args.cache:
+    from anid_cache import PageCache
+    cache = PageCache(args.cache_file, max_bytes=args.cache_max_mb * 1024 * 1024,
+                      ttls={"search": args.cache_ttl_search, "item": args.cache_ttl_item})
+
+# Determinar global_article_id desde la base de estado (en la cola compartida lo asigna la cola)
+global_article_id = load_existing_articles() if state is not None else 0
+
+def assign_article_id(article_data):
+    """Asigna el article_id: el ya registrado para la URL (reprocesamiento o actualización) o el siguiente disponible."""
+    global global_article_id
+    article_id = state.article_id(article_data["URL"])
+    if article_id is None:
+        global_article_id += 1
+        article_id = global_article_id
+    article_data["article_id"] = article_id
+    return article_id
+
+def is_processed(link, data_list):
+    """Indica si el enlace ya está guardado o espera en el batch actual."""
+    return state.is_processed(link) or any(article["URL"] == link for article in data_list)
+
+def run_api_mode():
+    """Extrae los artículos desde la API REST de DSpace, sin navegador.
+       No usa el checkpoint de página: los resultados ya guardados se descartan por URL,
+       y recorrer el listado completo cuesta pocas peticiones."""
+    from anid_api import DSpaceClient, query_from_search_url, fetch_articles
+
+    client = DSpaceClient(base_url, cache=cache)
+    query = query_from_search_url(search_url)
+    index = None
+    if args.fanout:
+        # Una búsqueda por alias en paralelo en lugar del OR de todos; los repetidos se descartan con el índice
+        from anid_fanout import DedupIndex, fanout_search
+        from anid_oai import affiliation_terms
+        terms = [term.strip() for term in args.query_terms.split(",")] if args.query_terms else affiliation_terms(query)
+        queries = [f'"{term}"' for term in terms if term]
+        index = DedupIndex(args.dedup_file, queries, capacity=args.dedup_capacity)
+        safe_print(f"🔀 {len(queries)} consultas en paralelo: {', '.join(queries)}")
+        result_pages = fanout_search(base_url, queries, index, size=args.api_page_size, cache=cache)
+    else:
+        result_pages = ((query, page, items) for page, items in client.iter_search(query, size=args.api_page_size))
+    data_list = []
+    total_articles = 0
+    pages = 0
+    try:
+        for label, page, items in result_pages:
+            pages += 1
+            metrics.incr("pages")
+            if index is not None:
+                safe_print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Procesando página {page} de {label} ({len(items)} ítems nuevos)...")
+            else:
+                safe_print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Procesando página de la API {page} ({len(items)} ítems)...")
             try:
-                metadata_table = driver.find_element(By.XPATH, "//ds-themed-full-item-page//table")
-                rows = metadata_table.find_elements(By.XPATH, ".//tbody/tr")
-                for row in rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 2:
-                        key = cells[0].text.strip().replace(":", "").replace(" ", ".")
-                        value = cells[1].text.strip()
-                        if key and value:
-                            if key in article_data:
-                                if isinstance(article_data[key], list):
-                                    article_data[key].append(value)
-                                else:
-                                    article_data[key] = value
-                            else:
-                                article_data[key] = value
+                for article_link, article_data, error in fetch_articles(client, items, base_url, snapshots):
+                    if error is not None:
+                        safe_print(f"❌ Error procesando el ítem {article_link or '(sin uuid)'}: {error}")
+                        if article_link is not None:
+                            log_error_link(article_link, error)
+                        else:
+                            metrics.incr("errors")
+                        continue
+                    if is_processed(article_link, data_list):
+                        continue
+                    assign_article_id(article_data)
+                    data_list.append(article_data)
+                    total_articles += 1
+                    if len(data_list) >= batch_size:
+                        safe_print(f"💾 Guardando tanda de {len(data_list)} artículos...")
+                        save_batch(data_list)
+                        data_list.clear()
             except Exception as e:
-                safe_print(f"⚠️ Error al extraer metadata en reprocesamiento: {str(e)}")
-            
-            for key, value in article_data.items():
-                if isinstance(value, list):
-                    article_data[key] = ", ".join(value)
-            
-            # Asignar ID autoincrementable: sumar al total actual
-            global_article_id += 1
-            article_data["article_id"] = global_article_id
-            # Guardar este registro reprocesado en el CSV (añadiéndolo, luego se eliminarán duplicados si fuera necesario)
-            save_batch([article_data], CSV_FILE)
-            safe_print("✅ Reprocesamiento exitoso.")
-        except Exception as e:
-            safe_print(f"❌ Error reprocesando {link}: {str(e)}")
-            continue
+                safe_print(f"❌ Error procesando la página {page} de la API: {str(e)}")
+    finally:
+        client.close()
+        if data_list:
+            safe_print(f"💾 Guardando los últimos {len(data_list)} artículos...")
+            save_batch(data_list)
+        writer.compact()
 
-# Nota: Se mantienen los registros en error_links.txt para análisis posterior si es necesario.
+    safe_print("\n📊 Resumen final:")
+    safe_print(f"📄 Páginas de la API procesadas: {pages}")
+    safe_print(f"🔗 Artículos totales nuevos encontrados: {total_articles}")
+    if index is not None:
+        index.print_report()
+        index.close()
+    metrics.print_summary()
+    if cache is not None:
+        cache.print_stats()
+    safe_print("🚀 Proceso finalizado.")
 
-# Configuración de Chrome
-chrome_options = Options()
-chrome_options.add_argument("--headless=new")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--window-size=1366,768")
-chrome_options.add_argument("--start-maximized")
-chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-chrome_options.add_argument("--lang=es-ES.UTF-8")
-
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-wait = WebDriverWait(driver, 40)
+def run_oai_mode():
+    """Cosecha incremental por OAI-PMH: solo los registros nuevos o modificados desde la última cosecha
+       exitosa, filtrados por las afiliaciones de search_url. Los registros se asocian por handle a las filas
+       ya guardadas: conservan su article_id y reemplazan a la versión anterior en el CSV consolidado."""
+    from anid_api import DSpaceClient, query_from_search_url
+    from anid_oai import (list_records, affiliation_terms, matches_affiliation, record_to_article, now_datestamp,
+                          match_granularity, identifier_handle, resolve_handle_url)
 
-# URL base y parámetros de búsqueda
-base_url = "https://repositorio.anid.cl"
-search_url = base_url + '/search?query="universidad%20de%20la%20frontera"%20OR%20"university%20of%20the%20frontier"%20OR%20"university%20of%20la%20frontera"%20OR%20"university%20of%20frontier"%20OR%20"frontier%20university"%20OR%20"univ%20la%20frontera"'
+    client = DSpaceClient(base_url, cache=cache)
+    terms = affiliation_terms(query_from_search_url(search_url))
+    from_date, until_date = match_granularity(args.oai_from or state.get_meta("oai_last_datestamp"),
+                                              args.oai_until or now_datestamp())
+    safe_print(f"🌾 Cosecha OAI-PMH desde {from_date or 'el inicio'} hasta {until_date}...")
+
+    data_list = []
+    harvested = new_records = updated_records = skipped = deleted = 0
+    completed = False
+    try:
+        for datestamp, identifier, metadata in list_records(client, args.oai_prefix, from_date, until_date, args.oai_set):
+            harvested += 1
+            if metadata is None:
+                deleted += 1
+                continue
+            if not matches_affiliation(metadata, terms):
+                skipped += 1
+                continue
+            # El registro reemplaza a la fila ya guardada del mismo ítem (por handle), aunque se haya guardado
+            # con la URL '/entities/...' de los modos selenium o api; los ítems nuevos usan esa misma URL
+            handle = identifier_handle(identifier)
+            url = state.url_for_handle(handle) or resolve_handle_url(client, base_url, handle)
+            article_data = record_to_article(base_url, identifier, metadata, url)
+            if state.is_processed(article_data["URL"]):
+                updated_records += 1
+            else:
+                new_records += 1
+            assign_article_id(article_data)
+            data_list.append(article_data)
+            if len(data_list) >= batch_size:
+                safe_print(f"💾 Guardando tanda de {len(data_list)} artículos (último datestamp {datestamp})...")
+                save_batch(data_list)
+                data_list.clear()
+        completed = True
+    except Exception as e:
+        safe_print(f"❌ Error en la cosecha OAI-PMH: {str(e)}")
+    finally:
+        client.close()
+        if data_list:
+            safe_print(f"💾 Guardando los últimos {len(data_list)} artículos...")
+            save_batch(data_list)
+        writer.compact()
+
+    if completed:
+        # La próxima cosecha parte desde el 'until' de esta
+        state.set_meta("oai_last_datestamp", until_date)
+        safe_print(f"✅ Datestamp de cosecha actualizado a: {until_date}")
+
+    safe_print("\n📊 Resumen final:")
+    safe_print(f"🌾 Registros OAI recibidos: {harvested}")
+    safe_print(f"🔗 Artículos nuevos: {new_records}")
+    safe_print(f"♻️ Artículos actualizados: {updated_records}")
+    safe_print(f"⏭️ Registros de otras afiliaciones: {skipped}")
+    safe_print(f"🗑️ Registros eliminados en el repositorio: {deleted}")
+    metrics.print_summary()
+    safe_print("🚀 Proceso finalizado.")
+
+def run_refresh_mode():
+    """Refresco incremental: revisa en la API el lastModified de cada artículo guardado y vuelve a anexar
+       solo los que cambiaron, con su article_id, para que reemplacen a su fila en el CSV consolidado."""
+    from anid_api import item_to_article
+    from anid_refresh import item_uuid_from_url, is_modified, probe_items
+    from anid_utils import article_fingerprint
+
+    rows = {}
+    without_uuid = 0
+    for url, article_id, updated_at, fingerprint, last_modified in state.refresh_candidates():
+        uuid = item_uuid_from_url(url)
+        if uuid:
+            rows[uuid] = (url, article_id, updated_at, fingerprint, last_modified)
+        else:
+            without_uuid += 1
+    safe_print(f"🔄 Revisando {len(rows)} artículos guardados con {args.refresh_workers} consultas simultáneas...")
+
+    data_list = []
+    # lastModified revisados: se guardan recién después de anexar el batch, para no perder cambios si se interrumpe
+    checked = []
+    probed = updated = unchanged = baseline = missing = errors = 0
+    try:
+        for uuid, item, error in probe_items(base_url, list(rows), workers=args.refresh_workers):
+            probed += 1
+            url, article_id, updated_at, fingerprint, last_modified = rows[uuid]
+            if error is not None:
+                if getattr(error, "status", None) == 404:
+                    missing += 1
+                else:
+                    errors += 1
+                    safe_print(f"❌ Error consultando {url}: {str(error)}")
+                continue
+            item_modified = item.get("lastModified")
+            if item_modified and not is_modified(item_modified, last_modified, updated_at):
+                if last_modified:
+                    unchanged += 1
+                else:
+                    # Primer refresco de la fila: su lastModified queda como línea base, sin reescribirla
+                    baseline += 1
+                checked.append((url, item_modified))
+                continue
+            article_data = item_to_article(item, base_url)
+            # La URL guardada identifica la fila, aunque el tipo de entidad haya cambiado
+            article_data["URL"] = url
+            if article_fingerprint(article_data) == fingerprint:
+                # Cambió el ítem (archivos, permisos...) pero no su metadata
+                unchanged += 1
+            else:
+                article_data["article_id"] = article_id
+                data_list.append(article_data)
+                updated += 1
+            checked.append((url, item_modified))
+            if len(data_list) >= batch_size:
+                safe_print(f"💾 Guardando tanda de {len(data_list)} artículos actualizados ({probed}/{len(rows)} revisados)...")
+                save_batch(data_list)
+                data_list.clear()
+                state.set_last_modified(checked)
+                checked.clear()
+    finally:
+        if data_list:
+            safe_print(f"💾 Guardando los últimos {len(data_list)} artículos actualizados...")
+            save_batch(data_list)
+        state.set_last_modified(checked)
+        if updated:
+            writer.compact()
+
+    safe_print("\n📊 Resumen final:")
+    safe_print(f"🔍 Artículos revisados: {probed}")
+    safe_print(f"♻️ Artículos actualizados: {updated}")
+    safe_print(f"✅ Artículos sin cambios: {unchanged}")
+    safe_print(f"📌 Artículos con lastModified registrado como línea base: {baseline}")
+    safe_print(f"🗑️ Ítems que ya no existen en el repositorio: {missing}")
+    safe_print(f"❌ Errores de consulta: {errors}")
+    if without_uuid:
+        safe_print(f"⏭️ URLs sin UUID (handles de OAI, se refrescan con --mode oai): {without_uuid}")
+    metrics.print_summary()
+    safe_print("🚀 Proceso finalizado.")
+
+def run_coordinator():
+    """Siembra la cola compartida (artículos ya conocidos con su article_id y la primera ventana de páginas)
+       y va incorporando al journal los artículos que terminan los workers, con el article_id asignado en la
+       cola. Termina cuando no quedan unidades pendientes ni arrendadas."""
+    from anid_queue import WorkQueue
+
+    queue = WorkQueue(args.queue_db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    if queue.initialize(state.articles(), window=args.queue_window):
+        safe_print(f"🧭 Cola '{args.queue_db}' sembrada con {args.queue_window} páginas de búsqueda.")
+    else:
+        safe_print(f"🧭 Reanudando la cola existente '{args.queue_db}'.")
+
+    merged = failed = 0
+    try:
+        while True:
+            # Se consulta antes de incorporar, para no perder resultados que lleguen al final
+            finished = queue.finished()
+            rows = queue.unmerged()
+            while rows:
+                data_batch = []
+                for article_id, url, status, article_data, last_error in rows:
+                    if status == "done":
+                        data_batch.append(article_data)
+                    else:
+                        log_error_link(url, last_error or "")
+                        failed += 1
+                if data_batch:
+                    save_batch(data_batch)
+                    merged += len(data_batch)
+                queue.mark_merged([row[0] for row in rows])
+                rows = queue.unmerged()
+            if finished:
+                break
+            counts = queue.counts()
+            safe_print(f"[{datetime.now().strftime('%H:%M:%S')}] Cola: páginas {counts['pages']}, "
+                       f"artículos {counts['articles']}; {merged} incorporados.")
+            time.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        queue.close()
+        writer.compact()
+
+    safe_print("\n📊 Resumen final:")
+    safe_print(f"🔗 Artículos incorporados desde la cola: {merged}")
+    safe_print(f"❌ Artículos que agotaron sus intentos: {failed}")
+    metrics.print_summary()
+    safe_print("🚀 Proceso finalizado.")
+
+if args.queue_db and args.role == "coordinator":
+    run_coordinator()
+    state.close()
+    sys.exit(0)
+
+if args.mode == "api":
+    run_api_mode()
+    sys.exit(0)
+
+if args.mode == "oai":
+    run_oai_mode()
+    sys.exit(0)
+
+if args.mode == "refresh":
+    run_refresh_mode()
+    sys.exit(0)
+
+# Selenium solo se importa en el modo selenium: los modos api, oai y refresh inician sin él
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from anid_selenium import create_driver, extract_article, extract_article_js
+from anid_pool import ArticleWorkerPool, SearchPagePrefetcher
+from anid_wait import wait_for_search_results, scroll_until_loaded
+from anid_retry import RetryScheduler, CircuitBreaker, with_circuit_breaker, backoff_delay
+
+# Reintentos diferidos dentro de la ejecución y corte de circuito ante ráfagas de errores del sitio
+retry = RetryScheduler(args.max_attempts, base_delay=args.retry_base_delay, max_delay=args.retry_max_delay)
+breaker = CircuitBreaker(threshold=args.breaker_threshold, window=args.breaker_window,
+                         min_samples=max(args.breaker_window // 2, 1), cooldown=args.breaker_cooldown)
+
+extract_fn = extract_article_js if args.extraction == "js" else extract_article
+if snapshots is not None:
+    from anid_snapshots import with_snapshots
+    extract_fn = with_snapshots(extract_fn, snapshots)
+# Los artículos servidos desde la caché no pasan por el circuito
+extract_fn = with_circuit_breaker(extract_fn, breaker)
+if cache is not None:
+    from anid_cache import with_page_cache
+    extract_fn = with_page_cache(extract_fn, cache)
+
+# Navegadores tibios del daemon: cada navegador del scraper toma uno libre; si no alcanzan, se inicia Chrome
+debugger_addresses = None
+if args.warm_browser:
+    from anid_browser_daemon import load_daemon_addresses
+    debugger_addresses = load_daemon_addresses(args.daemon_file)
+    if not debugger_addresses:
+        safe_print(f"⚠️ No hay navegadores registrados en '{args.daemon_file}'. Se iniciará Chrome.")
+driver_factory = partial(create_driver, lean=args.profile == "lean", cache_dir=args.chrome_cache_dir,
+                         driver_path=args.chromedriver, debugger_addresses=debugger_addresses)
+
+# Configuración de Chrome
+driver, wait = driver_factory()
 
-batch_size = 50  # Guardar cada 50 artículos
 data_list = []   # Batch actual
 total_articles = 0
-global_article_id = 0
-
-# Cargar CSV existente para evitar duplicados y determinar global_article_id
-processed_urls = set()
-if os.path.exists(CSV_FILE):
-    df_existing = pd.read_csv(CSV_FILE, encoding="utf-8-sig")
-    global_article_id = len(df_existing)
-    processed_urls = set(df_existing["URL"].tolist())
-    safe_print(f"📁 CSV existente: {global_article_id} artículos previamente guardados.")
-else:
-    safe_print("📁 No se encontró CSV existente. Iniciando desde cero.")
-
-# Reprocesar enlaces con errores
-error_links = load_error_links()
-if error_links:
-    safe_print(f"\n🔄 Reprocesando {len(error_links)} enlaces de error...")
-    for link in error_links:
-        if link in processed_urls:
+
+# Enlaces con error o incompletos (sin dc.title o dc.date) de ejecuciones anteriores: entran a la cola de
+# reintentos como vencidos y se procesan junto con la primera página
+# (con la cola compartida, los reintentos y las páginas los maneja la cola)
+page = None
+if not queue_worker:
+    links_to_reprocess = state.links_to_reprocess(args.max_attempts)
+    if links_to_reprocess:
+        safe_print(f"🔄 Se encontraron {len(links_to_reprocess)} enlaces con error o sin guardar para reprocesar.")
+        for link in links_to_reprocess:
+            retry.schedule_now(link)
+
+    # Cargar checkpoint de página
+    start_page = load_checkpoint_page()
+    # El checkpoint cuenta páginas del tamaño con que se guardó (10 antes de existir --rpp): se traduce al tamaño
+    # actual contando solo las páginas nuevas cubiertas por completo
+    checkpoint_rpp = int(state.get_meta("checkpoint_rpp", 10))
+    if global_article_id > 0 and checkpoint_rpp != args.rpp:
+        start_page = start_page * checkpoint_rpp // args.rpp
+        safe_print(f"📐 Checkpoint convertido de {checkpoint_rpp} a {args.rpp} resultados por página: {start_page}")
+    state.set_meta("checkpoint_rpp", args.rpp)
+    # Reanudar desde la página siguiente al último batch completo
+    if global_article_id > 0:
+        safe_print(f"⏩ Reanudando desde la página siguiente al último batch guardado: {start_page + 1}")
+        page = start_page + 1
+    else:
+        page = start_page
+
+# Pool de workers: el navegador principal solo recorre las páginas de búsqueda
+pool = None
+if args.workers > 1:
+    pool = ArticleWorkerPool(args.workers, driver_factory, extract_fn, min_interval=args.min_interval)
+
+def process_links(links):
+    """Extrae los artículos con el pool o, si hay un único worker, secuencialmente con el navegador principal.
+       Entrega tuplas (link, article_data, error)."""
+    if pool is not None:
+        yield from pool.process(links)
+        return
+    for link in links:
+        safe_print(f"\n📖 Procesando artículo - URL: {link}")
+        try:
+            yield link, extract_fn(driver, wait, link), None
+        except Exception as e:
+            yield link, None, str(e)
+
+def fetch_page_links(driver, wait, page_url):
+    """Abre una página de búsqueda y extrae los enlaces de artículos (li[data-test='list-object'])."""
+    with metrics.timer("search_get"):
+        driver.get(page_url)
+    app_container = wait.until(EC.presence_of_element_located((By.TAG_NAME, "ds-app")))
+    safe_print("✅ Contenedor principal ds-app encontrado.")
+    # Esperar a que se rendericen los resultados y hacer scroll mientras aparezcan artículos nuevos
+    wait_for_search_results(driver)
+    scroll_until_loaded(driver)
+
+    safe_print("🔎 Extrayendo enlaces de artículos (li[data-test='list-object'])...")
+    li_elements = driver.find_elements(By.CSS_SELECTOR, "li[data-test='list-object']")
+    page_links = []
+    for li in li_elements:
+        try:
+            a_element = li.find_element(By.CSS_SELECTOR, "a[href*='/entities/']")
+            href = a_element.get_attribute("href")
+            if href:
+                full_link = urljoin(base_url, href)
+                page_links.append(full_link)
+        except NoSuchElementException:
             continue
+    return page_links
+
+def get_page_links(driver, wait, page):
+    """Enlaces de una página de búsqueda, desde la caché si están vigentes."""
+    page_url = f"{search_url}&spc.page={page}&spc.rpp={args.rpp}"
+    if cache is not None:
+        cached = cache.get(page_url)
+        if cached is not None:
+            safe_print(f"🗄️ Enlaces de la página {page} obtenidos desde la caché.")
+            return json.loads(cached)
+    page_links = fetch_page_links(driver, wait, page_url)
+    if cache is not None and page_links:
+        cache.put(page_url, json.dumps(page_links), "search")
+    return page_links
+
+def fetch_search_page(driver, wait, page):
+    """get_page_links con reintentos exponenciales; espera si el circuito está abierto."""
+    safe_print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Procesando página de búsqueda {page}...")
+    for attempt in range(1, args.max_attempts + 1):
+        token = breaker.wait()
         try:
-            driver.get(link)
-            safe_print(f"🔍 Reprocesando artículo: {link}")
-            time.sleep(3)
-            try:
-                full_page_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Página completa del artículo')]"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", full_page_button)
-                driver.execute_script("arguments[0].click();", full_page_button)
-                wait.until(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'metadata-table')]")))
-                safe_print("✔ Botón 'Página completa' clickeado.")
-            except TimeoutException:
-                safe_print("⚠ No se encontró el botón 'Página completa' al reprocesar. Extrayendo metadata directamente.")
-                time.sleep(2)
-            
-            # Extraer metadata (similar a la extracción normal)
-            article_data = {
-                "article_id": None,  # Se asignará luego
-                "URL": link,
-                "dc.contributor": [],
-                "dc.creator": "",
-                "dc.date": "",
-                "dc.description.abstract": ""
-            }
-            try:
-                article_data["dc.title"] = driver.find_element(By.CSS_SELECTOR, "h2.heading").text.strip()
-            except Exception:
-                article_data["dc.title"] = ""
-            try:
-                autores = driver.find_elements(By.CSS_SELECTOR, "div.authority span")
-                if autores:
-                    article_data["dc.creator"] = autores[0].text.strip()
-                    for autor in autores:
-                        article_data["dc.contributor"].append(autor.text.strip())
-            except Exception:
-                article_data["dc.creator"] = ""
-            try:
-                article_data["dc.date"] = driver.find_element(By.CSS_SELECTOR, "div.date").text.strip()
-            except Exception:
-                article_data["dc.date"] = ""
-            try:
-                article_data["dc.description.abstract"] = driver.find_element(By.CSS_SELECTOR, "div.abstract-text").text.strip()[:500]
-            except Exception:
-                article_data["dc.description.abstract"] = ""
-            try:
-                metadata_table = driver.find_element(By.XPATH, "//ds-themed-full-item-page//table")
-                rows = metadata_table.find_elements(By.XPATH, ".//tbody/tr")
-                for row in rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 2:
-                        key = cells[0].text.strip().replace(":", "").replace(" ", ".")
-                        value = cells[1].text.strip()
-                        if key and value:
-                            if key in article_data:
-                                if isinstance(article_data[key], list):
-                                    article_data[key].append(value)
-                                else:
-                                    article_data[key] = value
-                            else:
-                                article_data[key] = value
-            except Exception as e:
-                safe_print(f"⚠️ Error al extraer metadata de la tabla en {link}: {str(e)}")
-            
-            # Convertir todas las listas a cadenas separadas por comas
-            for key, value in article_data.items():
-                if isinstance(value, list):
-                    article_data[key] = ", ".join(value)
-            
-            # Asignar un ID autoincrementable
-            global_article_id += 1
-            article_data["article_id"] = global_article_id
-            processed_urls.add(link)
-            # Guardar este artículo (se añade al CSV de inmediato para evitar pérdida)
-            df_existing = save_batch([article_data], CSV_FILE)
+            with metrics.timer("search_page"):
+                page_links = get_page_links(driver, wait, page)
         except Exception as e:
-            safe_print(f"❌ Error reprocesando el enlace {link}: {str(e)}")
+            breaker.record(False, token)
+            if attempt >= args.max_attempts:
+                raise
+            delay = backoff_delay(attempt, args.retry_base_delay, args.retry_max_delay)
+            safe_print(f"⚠️ Error al cargar la página {page} ({str(e)}); nuevo intento en {delay:.0f} s.")
+            metrics.incr("retries")
+            time.sleep(delay)
             continue
-    # Borrar el archivo de errores al finalizar el reprocesamiento
-    clear_error_links()
-
-# Actualizar global_article_id si se ha modificado el CSV
-if os.path.exists(CSV_FILE):
-    df_existing = pd.read_csv(CSV_FILE, encoding="utf-8-sig")
-    global_article_id = len(df_existing)
-
-# Cargar checkpoint de página
-start_page = load_checkpoint_page()
-# Reanudar desde la página siguiente al último batch completo
-if global_article_id > 0:
-    safe_print(f"⏩ Reanudando desde la página siguiente al último batch guardado: {start_page + 1}")
-    page = start_page + 1
-else:
+        breaker.record(True, token)
+        return page_links
+
+def handle_result(article_link, article_data, error, retrying=False):
+    """Escritor único: asigna IDs, deduplica y guarda por batches. Los enlaces con error vuelven a la
+       cola de reintentos con espera exponencial, hasta agotar sus intentos."""
+    if error is not None:
+        safe_print(f"❌ Error procesando el artículo {article_link}: {error}")
+        log_error_link(article_link, error)
+        delay = retry.schedule(article_link, state.attempts(article_link))
+        if delay is not None:
+            safe_print(f"🔁 Nuevo intento de {article_link} en {delay:.0f} s.")
+        return
+    # Un reintento puede reemplazar un registro incompleto ya guardado (conserva su article_id)
+    if not retrying and is_processed(article_link, data_list):
+        return
+    assign_article_id(article_data)
+    data_list.append(article_data)
+    safe_print(f"✅ Artículo global ID {article_data['article_id']} procesado correctamente.")
+
+    # Guardar en CSV cada batch_size artículos
+    if len(data_list) >= batch_size:
+        safe_print(f"💾 Guardando tanda de {len(data_list)} artículos...")
+        save_batch(data_list)
+        data_list.clear()
+
+# Enlaces enviados al pool y aún sin resultado (-> página de origen, o None si es un reintento), y páginas
+# cuyo checkpoint espera a que terminen todos sus artículos
+in_flight = {}
+open_pages = deque()
+page_remaining = {}
+max_in_flight = args.workers * 4
+# True si ningún worker del pool pudo mantener un navegador: se deja de paginar
+pool_exhausted = False
+
+def advance_checkpoint():
+    # El checkpoint avanza en orden: una página cuenta como hecha cuando ella y las anteriores terminaron.
+    # Si alguno de sus artículos sigue en el batch, el checkpoint espera a que ese batch se guarde.
+    global pending_checkpoint
+    while open_pages and page_remaining[open_pages[0]] == 0:
+        done_page = open_pages.popleft()
+        del page_remaining[done_page]
+        if data_list:
+            pending_checkpoint = done_page
+        else:
+            update_checkpoint_page(done_page)
+
+def finish_link(page, article_link, article_data, error):
+    handle_result(article_link, article_data, error, retrying=page is None)
+    if page is not None:
+        page_remaining[page] -= 1
+        advance_checkpoint()
+
+def collect_results(limit):
+    """Recoge los resultados listos del pool y, mientras haya más de 'limit' enlaces en curso, espera.
+       Si el pool se quedó sin navegadores, los enlaces en curso quedan pendientes para la próxima ejecución."""
+    global pool_exhausted
+    while in_flight:
+        try:
+            result = pool.next_result(block=len(in_flight) > limit)
+        except RuntimeError as e:
+            safe_print(f"❌ {str(e)}: {len(in_flight)} enlaces quedan pendientes para la próxima ejecución.")
+            pool_exhausted = True
+            in_flight.clear()
+            return
+        if result is None:
+            return
+        finish_link(in_flight.pop(result[0]), *result)
+
+def dispatch(links, page=None):
+    """Envía enlaces a extraer. Con el pool se encolan sin esperar a los de la página anterior y los
+       resultados se recogen a medida que terminan; con un único navegador se extraen en el momento."""
+    links = [link for link in links if link not in in_flight]
+    if page is not None:
+        open_pages.append(page)
+        page_remaining[page] = len(links)
+        advance_checkpoint()
+    if pool is None:
+        for result in process_links(links):
+            finish_link(page, *result)
+        return
+    for link in links:
+        in_flight[link] = page
+        pool.submit(link)
+    collect_results(max_in_flight)
+
+def process_retries(links):
+    if links:
+        safe_print(f"🔁 Reintentando {len(links)} enlaces...")
+        metrics.incr("retries", len(links))
+        dispatch(links)
+
+def iter_search_pages(start_page):
+    """Páginas de búsqueda en el hilo principal, una tras otra (--listing-workers 0).
+       Si una página falla, la excepción lleva su número en 'page', igual que con SearchPagePrefetcher."""
     page = start_page
+    while True:
+        try:
+            page_links = fetch_search_page(driver, wait, page)
+        except Exception as e:
+            e.page = page
+            raise
+        yield page, page_links
+        if not page_links:
+            return
+        page += 1
 
-# Proceso principal: recorrer páginas de búsqueda
-while True:
-    safe_print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Procesando página de búsqueda {page}...")
+def run_queue_worker():
+    """Procesa unidades de la cola compartida hasta que no queden: primero los artículos arrendados,
+       luego las páginas de búsqueda. Los resultados quedan en la cola para el coordinador."""
+    from anid_queue import WorkQueue, LeaseKeeper, default_worker_id
+
+    queue = WorkQueue(args.queue_db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    worker_id = args.worker_id or default_worker_id()
+    keeper = LeaseKeeper(queue, worker_id)
+    safe_print(f"🧭 Worker '{worker_id}' conectado a la cola '{args.queue_db}'.")
+    pages_done = articles_done = 0
     try:
-        driver.get(f"{search_url}&spc.page={page}")
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(3)
-        app_container = wait.until(EC.presence_of_element_located((By.TAG_NAME, "ds-app")))
-        safe_print("✅ Contenedor principal ds-app encontrado.")
-        # Hacer scroll para cargar artículos
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        for _ in range(5):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+        while True:
+            units = queue.claim_articles(worker_id, limit=max(args.workers, 1) * 2)
+            if units:
+                article_ids = dict(units)
+                for article_link, article_data, error in process_links(list(article_ids)):
+                    if error is not None:
+                        safe_print(f"❌ Error procesando el artículo {article_link}: {error}")
+                        metrics.incr("errors")
+                        queue.fail_article(article_link, error)
+                        continue
+                    article_data["article_id"] = article_ids[article_link]
+                    queue.complete_article(article_link, worker_id, article_data)
+                    metrics.incr("articles")
+                    articles_done += 1
+                continue
+
+            page = queue.claim_page(worker_id)
+            if page is not None:
+                try:
+                    page_links = fetch_search_page(driver, wait, page)
+                except Exception as e:
+                    safe_print(f"⚠️ Error al extraer enlaces de la página {page}: {str(e)}")
+                    queue.fail_page(page, str(e))
+                    continue
+                metrics.incr("pages")
+                queue.complete_page(page, worker_id, page_links)
+                pages_done += 1
+                continue
+
+            if queue.finished():
                 break
-            last_height = new_height
-        time.sleep(2)
-    except TimeoutException:
-        safe_print(f"❌ No se pudo cargar la página {page}. Terminando proceso.")
-        break
+            # Quedan unidades arrendadas por otros workers: si alguno muere, su arriendo vence y se reasigna
+            time.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        keeper.close()
+        queue.close()
+
+    safe_print("\n📊 Resumen final:")
+    safe_print(f"📄 Páginas de búsqueda procesadas: {pages_done}")
+    safe_print(f"🔗 Artículos procesados: {articles_done}")
+    metrics.print_summary()
 
-    # Extraer enlaces de artículos
+if queue_worker:
     try:
-        safe_print("🔎 Extrayendo enlaces de artículos (li[data-test='list-object'])...")
-        li_elements = driver.find_elements(By.CSS_SELECTOR, "li[data-test='list-object']")
-        page_links = []
-        for li in li_elements:
-            try:
-                a_element = li.find_element(By.CSS_SELECTOR, "a[href*='/entities/']")
-                href = a_element.get_attribute("href")
-                if href:
-                    full_link = urljoin(base_url, href)
-                    page_links.append(full_link)
-                    if len(page_links) >= 10:
-                        break
-            except NoSuchElementException:
-                continue
-        safe_print(f"✅ Se encontraron {len(page_links)} enlaces en la página {page}.")
-        if not page_links:
-            safe_print("❌ No se encontraron enlaces en esta página. Terminando paginación.")
-            break
+        run_queue_worker()
+    finally:
+        if pool is not None:
+            pool.close()
+        driver.quit()
+    safe_print("🚀 Proceso finalizado.")
+    sys.exit(0)
+
+# Las páginas de búsqueda se recorren por delante de la extracción: con --listing-workers N, N navegadores
+# propios piden páginas consecutivas a la vez (con el pool, uno de ellos es el navegador principal, que
+# queda libre). Sus enlaces pasan al pool sin esperar a que termine la página anterior.
+prefetcher = None
+if args.listing_workers > 0:
+    prefetcher = SearchPagePrefetcher(args.listing_workers, driver_factory, fetch_search_page, page,
+                                      shared_driver=(driver, wait) if pool is not None else None)
+search_pages = iter(prefetcher) if prefetcher is not None else iter_search_pages(page)
+pages_done = 0
+
+# Proceso principal: recorrer páginas de búsqueda, intercalando los reintentos que ya vencieron
+while True:
+    process_retries(retry.due())
+    try:
+        page, page_links = next(search_pages)
+    except StopIteration:
+        break
+    except TimeoutException as e:
+        safe_print(f"❌ No se pudo cargar la página {e.page}. Terminando proceso.")
+        break
     except Exception as e:
-        safe_print(f"⚠️ Error al extraer enlaces: {str(e)}")
+        safe_print(f"⚠️ Error al extraer enlaces de la página {e.page}: {str(e)}")
         break
+    safe_print(f"✅ Se encontraron {len(page_links)} enlaces en la página {page}.")
+    if not page_links:
+        safe_print("❌ No se encontraron enlaces en esta página. Terminando paginación.")
+        break
+    metrics.incr("pages")
+    pages_done += 1
 
     # Filtrar enlaces ya procesados (evitar duplicados)
-    page_links = [link for link in page_links if link not in processed_urls]
+    page_links = state.filter_new(page_links)
+    state.mark_pending(page_links)
     total_articles += len(page_links)
 
-    # Procesar cada artículo en la página
-    for article_link in page_links:
-        global_article_id += 1
-        safe_print(f"\n📖 Procesando artículo global ID {global_article_id} - URL: {article_link}")
-        try:
-            driver.get(article_link)
-            safe_print(f"🔍 Abriendo artículo: {article_link}")
-            time.sleep(3)
-            try:
-                full_page_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Página completa del artículo')]"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", full_page_button)
-                driver.execute_script("arguments[0].click();", full_page_button)
-                wait.until(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'metadata-table')]")))
-                safe_print("✔ Botón 'Página completa' clickeado.")
-            except TimeoutException:
-                safe_print("⚠ No se encontró el botón 'Página completa'. Extrayendo metadata directamente.")
-                time.sleep(2)
-            
-            # Inicializar diccionario de datos del artículo
-            article_data = {
-                "article_id": global_article_id,
-                "URL": article_link,
-                "dc.contributor": [],
-                "dc.creator": "",
-                "dc.date": "",
-                "dc.description.abstract": ""
-            }
-            
-            try:
-                article_data["dc.title"] = driver.find_element(By.CSS_SELECTOR, "h2.heading").text.strip()
-            except Exception:
-                pass
-            
-            try:
-                autores = driver.find_elements(By.CSS_SELECTOR, "div.authority span")
-                if autores:
-                    article_data["dc.creator"] = autores[0].text.strip()
-                    for autor in autores:
-                        article_data["dc.contributor"].append(autor.text.strip())
-            except Exception:
-                pass
-            
-            try:
-                article_data["dc.date"] = driver.find_element(By.CSS_SELECTOR, "div.date").text.strip()
-            except Exception:
-                pass
-            
-            try:
-                article_data["dc.description.abstract"] = driver.find_element(By.CSS_SELECTOR, "div.abstract-text").text.strip()[:500]
-            except Exception:
-                pass
-            
-            # Extraer metadata de la tabla
-            try:
-                metadata_table = driver.find_element(By.XPATH, "//ds-themed-full-item-page//table")
-                rows = metadata_table.find_elements(By.XPATH, ".//tbody/tr")
-                for row in rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 2:
-                        key = cells[0].text.strip().replace(":", "").replace(" ", ".")
-                        value = cells[1].text.strip()
-                        if key and value:
-                            if key in article_data:
-                                if isinstance(article_data[key], list):
-                                    article_data[key].append(value)
-                                else:
-                                    article_data[key] = value
-                            else:
-                                article_data[key] = value
-            except Exception as e:
-                safe_print(f"⚠️ No se pudo extraer la metadata completa de la tabla: {str(e)}")
-            
-            # Convertir todas las listas a cadenas separadas por comas (para todas las claves)
-            for key, value in article_data.items():
-                if isinstance(value, list):
-                    article_data[key] = ", ".join(value)
-            
-            data_list.append(article_data)
-            safe_print("✅ Artículo procesado correctamente.")
-            processed_urls.add(article_link)
-            
-            # Guardar en CSV cada batch_size artículos
-            if len(data_list) >= batch_size:
-                safe_print(f"💾 Guardando tanda de {len(data_list)} artículos...")
-                save_batch(data_list, CSV_FILE)
-                data_list.clear()
+    # Procesar cada artículo en la página (escritor único: IDs, deduplicación y guardado)
+    dispatch(page_links, page)
+    if pool_exhausted:
+        break
 
-        except Exception as e:
-            safe_print(f"❌ Error procesando el artículo: {str(e)}")
-            log_error_link(article_link)
-            continue
+if prefetcher is not None:
+    prefetcher.close()
+
+# Artículos aún en curso y reintentos pendientes al terminar la paginación: se espera a que venza cada uno
+while (in_flight or len(retry)) and not pool_exhausted:
+    if in_flight:
+        collect_results(0)
+    else:
+        process_retries(retry.wait_next())
 
-    update_checkpoint_page(page)
-    page += 1
+if pool is not None:
+    pool.close()
 
 # Guardar cualquier dato restante
 if data_list:
     safe_print(f"💾 Guardando los últimos {len(data_list)} artículos...")
-    save_batch(data_list, CSV_FILE)
+    save_batch(data_list)
+writer.compact()
 
 safe_print("\n📊 Resumen final:")
-safe_print(f"📄 Páginas de búsqueda procesadas: {page - 1}")
+safe_print(f"📄 Páginas de búsqueda procesadas: {pages_done}")
 safe_print(f"🔗 Artículos totales nuevos encontrados (según páginas): {total_articles}")
-if os.path.exists(ERROR_FILE):
-    with open(ERROR_FILE, 'r', encoding='utf-8') as f:
-        error_lines = f.readlines()
-    safe_print(f"❌ Errores: {len(error_lines)}")
-else:
-    safe_print("❌ Errores: 0")
+safe_print(f"❌ Errores: {state.count_status('failed')}")
+metrics.print_summary()
+if cache is not None:
+    cache.print_stats()
 
 driver.quit()
+state.close()
 safe_print("🚀 Proceso finalizado.")
@@ -0,0 +1,210 @@
+import json
+import time
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit, urlencode, parse_qs
+
+from anid_utils import safe_print, new_article_data, merge_metadata_row, finalize_article
+from anid_metrics import metrics
+
+# Motor de extracción basado en la API REST de DSpace 7 (sin navegador).
+# El front end Angular de repositorio.anid.cl consume estos mismos endpoints:
+#   /server/api/discover/search/objects  -> resultados de búsqueda
+#   /server/api/core/items/{uuid}        -> metadata completa de un ítem
+
+SEARCH_ENDPOINT = "/server/api/discover/search/objects"
+ITEM_ENDPOINT = "/server/api/core/items/{uuid}"
+DEFAULT_PAGE_SIZE = 100
+MAX_RETRIES = 3
+
+HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+
+class DSpaceAPIError(Exception):
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class DSpaceClient:
+    """Cliente HTTP mínimo para la API REST de DSpace. Reutiliza una única conexión keep-alive."""
+
+    def __init__(self, base_url, timeout=30, cache=None):
+        parsed = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.cache = cache
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn_class = HTTPSConnection if self.scheme == "https" else HTTPConnection
+            self._conn = conn_class(self.host, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _cache_resource(self, path):
+        # Solo se cachean búsquedas e ítems; los resumptionToken de OAI son efímeros
+        if path.startswith(SEARCH_ENDPOINT):
+            return "search"
+        if path.startswith(ITEM_ENDPOINT.split("{")[0]):
+            return "item"
+        return None
+
+    def get_raw(self, path, params=None, accept="application/json"):
+        """GET con reintentos ante errores de conexión o 5xx. Devuelve el cuerpo en bytes."""
+        resource = self._cache_resource(path) if self.cache is not None else None
+        if resource:
+            cached = self.cache.get(self.base_url + path, params)
+            if cached is not None:
+                return cached
+        body = self._fetch(path, params, accept)
+        if resource:
+            self.cache.put(self.base_url + path, body, resource, params)
+        return body
+
+    def _fetch(self, path, params, accept):
+        url = self.prefix + path
+        if params:
+            url += "?" + urlencode(params)
+        headers = dict(HEADERS, Accept=accept)
+        last_error = None
+        for attempt in range(MAX_RETRIES):
+            if attempt:
+                metrics.incr("retries")
+            try:
+                with metrics.timer("api_request"):
+                    conn = self._connection()
+                    conn.request("GET", url, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+            except (HTTPException, OSError) as e:
+                if isinstance(e, TimeoutError):
+                    metrics.incr("timeouts")
+                # Conexión cerrada por el servidor o timeout: reconectar y reintentar
+                self.close()
+                last_error = e
+                time.sleep(2 ** attempt)
+                continue
+            if response.status >= 500:
+                last_error = DSpaceAPIError(f"HTTP {response.status} en {url}", response.status)
+                time.sleep(2 ** attempt)
+                continue
+            if response.status != 200:
+                raise DSpaceAPIError(f"HTTP {response.status} en {url}", response.status)
+            return body
+        raise DSpaceAPIError(f"No se pudo obtener {url}: {last_error}")
+
+    def get_json(self, path, params=None):
+        return json.loads(self.get_raw(path, params).decode("utf-8"))
+
+    def search(self, query, page=0, size=DEFAULT_PAGE_SIZE):
+        """Devuelve (items, page_info) para una página (base 0) de resultados de búsqueda."""
+        data = self.get_json(SEARCH_ENDPOINT, {
+            "query": query,
+            "dsoType": "ITEM",
+            "page": page,
+            "size": size,
+        })
+        result = data.get("_embedded", {}).get("searchResult", {})
+        objects = result.get("_embedded", {}).get("objects", [])
+        items = [obj.get("_embedded", {}).get("indexableObject") for obj in objects]
+        return [item for item in items if item], result.get("page", {})
+
+    def get_item(self, uuid):
+        return self.get_json(ITEM_ENDPOINT.format(uuid=uuid))
+
+    def iter_search(self, query, size=DEFAULT_PAGE_SIZE, start_page=0):
+        """Recorre todas las páginas de resultados de búsqueda. Entrega (número de página, items)."""
+        page = start_page
+        while True:
+            items, page_info = self.search(query, page=page, size=size)
+            if not items:
+                break
+            yield page, items
+            total_pages = page_info.get("totalPages")
+            page += 1
+            if total_pages is not None and page >= total_pages:
+                break
+
+
+def query_from_search_url(search_url):
+    """Extrae el parámetro 'query' de la URL de búsqueda del front end."""
+    params = parse_qs(urlsplit(search_url).query)
+    return params.get("query", [""])[0]
+
+
+def item_url(base_url, item):
+    """URL pública del ítem, con el mismo formato '/entities/...' que enlaza la página de búsqueda."""
+    metadata = item.get("metadata", {})
+    entity_type = item.get("entityType")
+    if not entity_type and metadata.get("dspace.entity.type"):
+        entity_type = metadata["dspace.entity.type"][0].get("value")
+    if entity_type:
+        return f"{base_url.rstrip('/')}/entities/{entity_type.lower()}/{item['uuid']}"
+    return f"{base_url.rstrip('/')}/items/{item['uuid']}"
+
+
+def _first_value(metadata, *keys):
+    for key in keys:
+        values = metadata.get(key) or []
+        for entry in values:
+            if entry.get("value"):
+                return entry["value"].strip()
+    return ""
+
+
+def item_to_article(item, base_url):
+    """Convierte un ítem JSON de DSpace en el mismo diccionario 'article_data' que produce el scraper de la tabla."""
+    return metadata_to_article(item_url(base_url, item), item.get("metadata", {}), item.get("name"))
+
+
+def metadata_to_article(link, metadata, name=None):
+    """Convierte la metadata de DSpace ({clave: [{"value": ...}, ...]}) en el diccionario 'article_data'."""
+    article_data = new_article_data(link)
+
+    # Campos de la cabecera del ítem (h2.heading, div.authority, div.date, div.abstract-text)
+    article_data["dc.title"] = _first_value(metadata, "dc.title") or (name or "").strip()
+    autores = [entry["value"].strip() for entry in metadata.get("dc.contributor.author") or metadata.get("dc.creator") or []
+               if entry.get("value")]
+    if autores:
+        article_data["dc.creator"] = autores[0]
+        article_data["dc.contributor"].extend(autores)
+    article_data["dc.date"] = _first_value(metadata, "dc.date.issued", "dc.date")
+    article_data["dc.description.abstract"] = _first_value(metadata, "dc.description.abstract")[:500]
+
+    # Filas de la tabla de metadata completa (una fila por valor)
+    for key, values in metadata.items():
+        for entry in values:
+            merge_metadata_row(article_data, key, entry.get("value") or "")
+
+    return finalize_article(article_data)
+
+
+def fetch_articles(client, items, base_url, snapshots=None):
+    """Convierte los ítems de una página de búsqueda. Si la búsqueda no trae la metadata embebida,
+       se consulta el endpoint del ítem. Con un SnapshotStore, se guarda el JSON de cada ítem.
+       Entrega tuplas (url, article_data, error), como el pool de Selenium: un ítem con error no corta la página."""
+    for item in items:
+        url = item_url(base_url, item) if item.get("uuid") else None
+        try:
+            if not item.get("metadata"):
+                safe_print(f"🔍 Consultando metadata completa del ítem {item.get('uuid')}")
+                item = client.get_item(item["uuid"])
+            article_data = item_to_article(item, base_url)
+        except Exception as e:
+            yield url, None, str(e)
+            continue
+        if snapshots is not None:
+            snapshots.save(article_data["URL"], json.dumps(item, ensure_ascii=False), "json")
+        yield article_data["URL"], article_data, None
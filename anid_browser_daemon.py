@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.request import urlopen
+
+from anid_utils import safe_print, configure_stdout
+
+# Daemon de navegadores tibios: mantiene N procesos de Chrome headless abiertos entre ejecuciones, cada
+# uno con su perfil persistente (incluida la caché en disco del bundle de Angular) y un puerto de
+# depuración remota. Con --warm-browser, el scraper se conecta a ellos (debuggerAddress) en lugar de
+# iniciar un Chrome nuevo; al terminar solo cierra su sesión y el navegador sigue abierto.
+#
+# Las direcciones quedan en browser_daemon.json. Si un navegador muere, el daemon lo vuelve a iniciar.
+# Un daemon atiende a un solo scraper a la vez (cada navegador admite una sesión).
+#
+#   python anid_browser_daemon.py --browsers 4 --profile lean
+
+DAEMON_FILE = "browser_daemon.json"
+CHROME_CANDIDATES = (
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+)
+STARTUP_TIMEOUT = 30  # Segundos para que un Chrome nuevo abra su puerto de depuración
+CHECK_INTERVAL = 5  # Segundos entre revisiones de los navegadores
+
+
+def find_chrome():
+    for candidate in CHROME_CANDIDATES:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    return None
+
+
+def browser_alive(address, timeout=1.0):
+    """Indica si hay un Chrome escuchando en la dirección de depuración remota (host:puerto)."""
+    try:
+        with urlopen(f"http://{address}/json/version", timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def load_daemon_addresses(daemon_file=DAEMON_FILE):
+    """Direcciones de depuración de los navegadores del daemon, o [] si no hay un daemon registrado."""
+    try:
+        with open(daemon_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("addresses", [])
+    except (OSError, ValueError):
+        return []
+
+
+class BrowserDaemon:
+
+    def __init__(self, chrome_binary, count=1, port=9222, profile_dir="chrome_profiles", lean=False,
+                 start_url=None, daemon_file=DAEMON_FILE):
+        self.chrome_binary = chrome_binary
+        self.port = port
+        self.profile_dir = profile_dir
+        self.lean = lean
+        self.start_url = start_url
+        self.daemon_file = daemon_file
+        self.addresses = [f"127.0.0.1:{port + i}" for i in range(count)]
+        self.processes = [None] * count
+
+    def _launch(self, index):
+        from anid_selenium import chrome_arguments
+
+        address = self.addresses[index]
+        if browser_alive(address):
+            raise RuntimeError(f"El puerto de {address} ya está en uso")
+        profile = os.path.abspath(os.path.join(self.profile_dir, f"browser-{index}"))
+        os.makedirs(profile, exist_ok=True)
+        command = [self.chrome_binary, *chrome_arguments(self.lean),
+                   f"--remote-debugging-port={self.port + index}", f"--user-data-dir={profile}",
+                   "--no-first-run", "--no-default-browser-check"]
+        if self.start_url:
+            # La primera carga deja el bundle de Angular en la caché del perfil
+            command.append(self.start_url)
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.processes[index] = process
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not browser_alive(address):
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"Chrome no respondió en {address}")
+            time.sleep(0.2)
+
+    def _save(self):
+        tmp_file = self.daemon_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "addresses": self.addresses, "lean": self.lean,
+                       "started_at": datetime.now().isoformat(timespec="seconds")}, f)
+        os.replace(tmp_file, self.daemon_file)
+
+    def start(self):
+        for index, address in enumerate(self.addresses):
+            self._launch(index)
+            safe_print(f"♨️ Navegador {index + 1}/{len(self.addresses)} listo en {address}")
+        self._save()
+        safe_print(f"♨️ Direcciones guardadas en '{self.daemon_file}'. Ctrl+C para cerrar los navegadores.")
+
+    def run(self):
+        """Vigila los navegadores y vuelve a iniciar los que terminaron."""
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if process is not None and process.poll() is None:
+                    continue
+                safe_print(f"⚠️ El navegador de {self.addresses[index]} terminó. Reiniciándolo...")
+                try:
+                    self._launch(index)
+                except RuntimeError as e:
+                    safe_print(f"❌ {str(e)}")
+
+    def stop(self):
+        if os.path.exists(self.daemon_file):
+            os.remove(self.daemon_file)
+        for process in self.processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+if __name__ == "__main__":
+    configure_stdout()
+    parser = argparse.ArgumentParser(description="Mantiene navegadores Chrome abiertos para que el scraper se conecte a ellos")
+    parser.add_argument("--browsers", type=int, default=1,
+                        help="Cantidad de navegadores (uno por navegador del scraper: principal, --workers y --listing-workers)")
+    parser.add_argument("--port", type=int, default=9222, help="Puerto de depuración del primer navegador (los demás, consecutivos)")
+    parser.add_argument("--profile", choices=["normal", "lean"], default="normal",
+                        help="Perfil de Chrome: el mismo que usará el scraper con --profile")
+    parser.add_argument("--profile-dir", default="chrome_profiles", help="Directorio de los perfiles persistentes")
+    parser.add_argument("--chrome-binary", default=None, help="Ejecutable de Chrome (por defecto se busca en el PATH)")
+    parser.add_argument("--start-url", default="https://repositorio.anid.cl",
+                        help="Página que abre cada navegador al iniciar ('' para ninguna)")
+    parser.add_argument("--daemon-file", default=DAEMON_FILE, help="Archivo donde se publican las direcciones")
+    args = parser.parse_args()
+
+    chrome_binary = args.chrome_binary or find_chrome()
+    if not chrome_binary:
+        safe_print("❌ No se encontró Chrome. Indique su ruta con --chrome-binary.")
+        sys.exit(1)
+
+    daemon = BrowserDaemon(chrome_binary, args.browsers, args.port, args.profile_dir, args.profile == "lean",
+                           args.start_url, args.daemon_file)
+    # Terminar con SIGTERM igual que con Ctrl+C, cerrando los navegadores
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        daemon.start()
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        safe_print(f"❌ {str(e)}")
+        sys.exit(1)
+    finally:
+        daemon.stop()
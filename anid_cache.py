@@ -0,0 +1,168 @@
+import gzip
+import importlib.util
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from anid_utils import safe_print
+
+# Caché en disco de respuestas (páginas de búsqueda, ítems, JSON de la API), con TTL por tipo de
+# recurso, tamaño máximo y desalojo LRU. Persiste entre ejecuciones, por lo que un reinicio o una
+# ejecución de depuración no vuelve a pedir al sitio lo que ya obtuvo dentro del TTL.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+"""
+
+DEFAULT_TTLS = {
+    "search": 3600,   # listados de búsqueda: 1 hora
+    "item": 86400,    # páginas y JSON de ítems: 1 día
+}
+
+
+def cache_key(url, params=None):
+    """Clave normalizada: URL sin fragmento y parámetros de consulta ordenados."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(key, str(value)) for key, value in params.items()]
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(sorted(query)), ""))
+
+
+class PageCache:
+
+    def __init__(self, db_file="http_cache.db", max_bytes=512 * 1024 * 1024, ttls=None):
+        self.db_file = db_file
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url, params=None):
+        key = cache_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires_at, size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = row
+            with self.conn:
+                if expires_at <= now:
+                    self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.total_bytes -= size
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+                self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return gzip.decompress(value)
+
+    def put(self, url, value, resource, params=None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        ttl = self.ttls.get(resource)
+        if not ttl:
+            return
+        key = cache_key(url, params)
+        compressed = gzip.compress(value)
+        size = len(compressed)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self.conn:
+            previous = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if previous:
+                self.total_bytes -= previous[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, resource, value, size, stored_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, resource, compressed, size, now, now + ttl, now))
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        # Desalojo LRU hasta volver bajo el tamaño máximo
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self):
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "bytes": self.total_bytes,
+            }
+
+    def print_stats(self):
+        stats = self.stats()
+        safe_print(f"🗄️ Caché: {stats['hits']} aciertos, {stats['misses']} fallos "
+                   f"(tasa {stats['hit_rate']:.0%}), {stats['entries']} entradas, "
+                   f"{stats['bytes'] / 1024 / 1024:.1f} MB, {stats['evictions']} desalojos.")
+
+
+def is_complete_page(article_data, html):
+    """Una página vale la pena en caché solo si trae la tabla de metadata completa, dc.title y dc.date:
+       un registro incompleto se reintenta, y el reintento debe volver a abrir la página."""
+    return bool(article_data.get("dc.title") and article_data.get("dc.date")
+                and "ds-themed-full-item-page" in html and "<td" in html)
+
+
+def with_page_cache(extract_fn, cache):
+    """Envuelve una función de extracción de Selenium: si el HTML renderizado del artículo está en caché,
+       se extrae con lxml sin abrir el navegador; si no, se extrae en vivo y se guarda el HTML
+       (solo si la extracción quedó completa)."""
+    from anid_reparse import parse_html
+    if importlib.util.find_spec("lxml") is None:
+        safe_print("⚠️ La caché de artículos requiere lxml; solo se usará para los listados de búsqueda.")
+        return extract_fn
+
+    def extract(driver, wait, link):
+        html = cache.get(link)
+        if html is not None:
+            html = html.decode("utf-8")
+            article_data = parse_html(link, html)
+            if is_complete_page(article_data, html):
+                return article_data
+        article_data = extract_fn(driver, wait, link)
+        html = driver.page_source
+        if is_complete_page(article_data, html):
+            cache.put(link, html, "item")
+        return article_data
+    return extract
@@ -0,0 +1,143 @@
+import hashlib
+import math
+import os
+import queue
+import sqlite3
+import threading
+
+from anid_utils import safe_print
+from anid_api import DSpaceClient, DEFAULT_PAGE_SIZE
+
+# Búsqueda en abanico: en lugar de una sola consulta con todos los alias de la afiliación unidos con OR,
+# se ejecuta una búsqueda por alias en paralelo y los resultados se combinan con un índice de duplicados.
+#
+# El índice usa un filtro de Bloom en memoria (tamaño fijo) delante de una tabla SQLite en disco:
+# una clave que el filtro no conoce es nueva con certeza; si el filtro la conoce, SQLite lo confirma.
+# La tabla guarda, por ítem, la máscara de bits de las consultas que lo encontraron, de donde salen
+# los conteos de solapamiento por consulta.
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Agrega la clave. Devuelve True si posiblemente ya estaba (False: nueva con certeza)."""
+        present = True
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+
+class DedupIndex:
+    """Índice de ítems vistos por una ejecución en abanico. Se recrea en cada ejecución."""
+
+    def __init__(self, db_file, queries, capacity=1_000_000, error_rate=0.01):
+        self.db_file = db_file
+        self.queries = list(queries)
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.false_positives = 0
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE seen (key TEXT PRIMARY KEY, queries INTEGER NOT NULL)")
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.db_file)
+
+    def add(self, key, query_index):
+        """Registra que la consulta 'query_index' encontró 'key'. Devuelve True si el ítem es nuevo."""
+        bit = 1 << query_index
+        with self.conn:
+            if self.bloom.add(key):
+                updated = self.conn.execute("UPDATE seen SET queries = queries | ? WHERE key = ?", (bit, key)).rowcount
+                if updated:
+                    return False
+                self.false_positives += 1
+            self.conn.execute("INSERT INTO seen (key, queries) VALUES (?, ?)", (key, bit))
+        return True
+
+    def overlap(self):
+        """Por consulta: resultados, exclusivos (solo esa consulta los encontró) y compartidos con cada otra."""
+        masks = self.conn.execute("SELECT queries, COUNT(*) FROM seen GROUP BY queries").fetchall()
+        report = []
+        for i, query in enumerate(self.queries):
+            bit = 1 << i
+            total = sum(count for mask, count in masks if mask & bit)
+            exclusive = sum(count for mask, count in masks if mask == bit)
+            shared = {other: sum(count for mask, count in masks if mask & bit and mask & (1 << j))
+                      for j, other in enumerate(self.queries) if j != i}
+            report.append({"query": query, "results": total, "exclusive": exclusive, "shared": shared})
+        return report
+
+    def redundant_queries(self):
+        """Consultas que se pueden quitar juntas sin perder ítems: las que quedan fuera de una cobertura
+           mínima armada con el método voraz (se elige cada vez la consulta que más ítems nuevos cubre)."""
+        masks = self.conn.execute("SELECT queries, COUNT(*) FROM seen GROUP BY queries").fetchall()
+        chosen = 0
+        while True:
+            gains = [(sum(count for mask, count in masks if mask & (1 << i) and not mask & chosen), i)
+                     for i in range(len(self.queries)) if not chosen & (1 << i)]
+            gain, best = max(gains, key=lambda pair: pair[0], default=(0, None))
+            if not gain:
+                break
+            chosen |= 1 << best
+        return [query for i, query in enumerate(self.queries) if not chosen & (1 << i)]
+
+    def print_report(self):
+        unique = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        safe_print(f"🔀 Consultas en abanico: {unique} ítems únicos ({self.false_positives} falsos positivos del filtro).")
+        redundant = set(self.redundant_queries())
+        for row in self.overlap():
+            top = sorted(row["shared"].items(), key=lambda item: item[1], reverse=True)[:2]
+            shared = ", ".join(f"'{other}' {count}" for other, count in top if count)
+            safe_print(f"   '{row['query']}': {row['results']} resultados, {row['exclusive']} exclusivos"
+                       + (f"; compartidos con {shared}" if shared else ""))
+            if row["results"] and row["query"] in redundant:
+                safe_print("      ↳ redundante dado el resto: los alias marcados se pueden quitar juntos sin perder ítems")
+
+
+def fanout_search(base_url, queries, index, size=DEFAULT_PAGE_SIZE, cache=None, max_pending=16):
+    """Ejecuta una búsqueda por consulta en paralelo (un hilo y una conexión por consulta) y entrega
+       (query, page, items) con solo los ítems que ninguna consulta había entregado antes."""
+    results = queue.Queue(maxsize=max_pending)
+
+    def worker(query_index, query):
+        client = DSpaceClient(base_url, cache=cache)
+        try:
+            for page, items in client.iter_search(query, size=size):
+                results.put(("items", query_index, page, items))
+        except Exception as e:
+            results.put(("error", query_index, None, e))
+        finally:
+            client.close()
+            results.put(("done", query_index, None, None))
+
+    for query_index, query in enumerate(queries):
+        threading.Thread(target=worker, args=(query_index, query), name=f"fanout-{query_index}", daemon=True).start()
+
+    remaining = len(queries)
+    while remaining:
+        kind, query_index, page, payload = results.get()
+        if kind == "done":
+            remaining -= 1
+        elif kind == "error":
+            safe_print(f"❌ Error en la consulta '{queries[query_index]}': {str(payload)}")
+        else:
+            new_items = [item for item in payload if index.add(item.get("uuid") or item.get("id", ""), query_index)]
+            yield queries[query_index], page, new_items
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from anid_utils import safe_print
+
+# Instrumentación del scraper: temporizadores por etapa (driver.get, esperas, extracción, guardado...)
+# y contadores (páginas, artículos, timeouts, reintentos, bytes escritos). Se publican como líneas JSON
+# periódicas y, opcionalmente, en un endpoint local con formato de texto de Prometheus.
+#
+# Hay una única instancia 'metrics' por proceso, compartida por todos los módulos y workers.
+
+RESERVOIR_SIZE = 2048
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Metrics:
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._stages = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            data = self._stages.get(stage)
+            if data is None:
+                data = self._stages[stage] = {"count": 0, "total": 0.0, "recent": deque(maxlen=RESERVOIR_SIZE)}
+            data["count"] += 1
+            data["total"] += seconds
+            data["recent"].append(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start)
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            counters = dict(self._counters)
+            stages = {}
+            for stage, data in self._stages.items():
+                recent = sorted(data["recent"])
+                stages[stage] = {
+                    "count": data["count"],
+                    "total_s": round(data["total"], 3),
+                    "p50_s": round(_percentile(recent, 0.50), 3),
+                    "p95_s": round(_percentile(recent, 0.95), 3),
+                }
+        minutes = max(elapsed / 60, 1e-9)
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_s": round(elapsed, 1),
+            "pages_per_min": round(counters.get("pages", 0) / minutes, 2),
+            "articles_per_min": round(counters.get("articles", 0) / minutes, 2),
+            "counters": counters,
+            "stages": stages,
+        }
+
+    def prometheus(self):
+        """Texto en formato de exposición de Prometheus."""
+        snap = self.snapshot()
+        lines = [
+            "# TYPE anid_elapsed_seconds gauge",
+            f"anid_elapsed_seconds {snap['elapsed_s']}",
+            "# TYPE anid_pages_per_minute gauge",
+            f"anid_pages_per_minute {snap['pages_per_min']}",
+            "# TYPE anid_articles_per_minute gauge",
+            f"anid_articles_per_minute {snap['articles_per_min']}",
+        ]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE anid_{name}_total counter")
+            lines.append(f"anid_{name}_total {value}")
+        lines.append("# TYPE anid_stage_seconds summary")
+        for stage, data in sorted(snap["stages"].items()):
+            lines.append(f'anid_stage_seconds{{stage="{stage}",quantile="0.5"}} {data["p50_s"]}')
+            lines.append(f'anid_stage_seconds{{stage="{stage}",quantile="0.95"}} {data["p95_s"]}')
+            lines.append(f'anid_stage_seconds_sum{{stage="{stage}"}} {data["total_s"]}')
+            lines.append(f'anid_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self):
+        snap = self.snapshot()
+        safe_print(f"⏱️ Ritmo: {snap['pages_per_min']} páginas/min, {snap['articles_per_min']} artículos/min, "
+                   f"{snap['counters'].get('timeouts', 0)} timeouts, {snap['counters'].get('retries', 0)} reintentos, "
+                   f"{snap['counters'].get('bytes_written', 0) / 1024 / 1024:.1f} MB escritos.")
+        for stage, data in sorted(snap["stages"].items()):
+            safe_print(f"   {stage}: {data['count']} × p50 {data['p50_s']} s, p95 {data['p95_s']} s")
+
+
+metrics = Metrics()
+
+
+class MetricsReporter:
+    """Escribe una línea JSON con el estado de las métricas cada 'interval' segundos y, si se indica un
+       puerto, sirve /metrics en formato Prometheus mientras dura la ejecución."""
+
+    def __init__(self, jsonl_file=None, interval=30, port=None):
+        self.jsonl_file = jsonl_file
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+        if jsonl_file:
+            self._thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+            self._thread.start()
+        if port:
+            self._server = _metrics_server(port)
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            safe_print(f"📈 Métricas disponibles en http://127.0.0.1:{self._server.server_port}/metrics")
+
+    def _write(self):
+        with open(self.jsonl_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics.snapshot(), ensure_ascii=False) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _metrics_server(port):
+    # http.server se importa solo si se pide el endpoint: no suma al tiempo de inicio de cada ejecución
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
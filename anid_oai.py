@@ -0,0 +1,131 @@
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+from anid_api import DSpaceAPIError, metadata_to_article, item_url
+
+# Cosecha incremental por OAI-PMH (ListRecords con resumptionToken y from/until).
+# DSpace 7 publica OAI en /server/oai/request. Con el formato 'dim' cada campo trae
+# esquema, elemento y calificador, lo que da exactamente las claves dc.* de la tabla de metadata;
+# 'oai_dc' solo trae Dublin Core simple (dc.title, dc.creator, dc.date, ...).
+
+OAI_ENDPOINT = "/server/oai/request"
+
+NAMESPACES = {
+    "oai": "http://www.openarchives.org/OAI/2.0/",
+    "oai_dc": "http://www.openarchives.org/OAI/2.0/oai_dc/",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "dim": "http://www.dspace.org/xmlns/dspace/dim",
+}
+
+
+class OAIError(Exception):
+    pass
+
+
+def now_datestamp():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def match_granularity(from_date, until_date):
+    """OAI-PMH responde badArgument si from y until tienen granularidades distintas: si uno de los dos es
+       solo una fecha (YYYY-MM-DD), el otro se recorta a su fecha."""
+    if from_date and until_date and (len(from_date) == 10) != (len(until_date) == 10):
+        return from_date[:10], until_date[:10]
+    return from_date, until_date
+
+
+def affiliation_terms(query):
+    """Frases entre comillas de la consulta de búsqueda ('"universidad de la frontera" OR ...'), en minúsculas."""
+    return [term.lower() for term in re.findall(r'"([^"]+)"', query)] or [query.lower()]
+
+
+def _parse_dim(metadata_element):
+    metadata = {}
+    for field in metadata_element.iter(f"{{{NAMESPACES['dim']}}}field"):
+        key = ".".join(part for part in (field.get("mdschema"), field.get("element"), field.get("qualifier")) if part)
+        if field.text and field.text.strip():
+            metadata.setdefault(key, []).append({"value": field.text.strip()})
+    return metadata
+
+
+def _parse_oai_dc(metadata_element):
+    metadata = {}
+    for field in metadata_element.iter():
+        if field.tag.startswith(f"{{{NAMESPACES['dc']}}}") and field.text and field.text.strip():
+            key = "dc." + field.tag.split("}", 1)[1]
+            metadata.setdefault(key, []).append({"value": field.text.strip()})
+    return metadata
+
+
+def identifier_handle(identifier):
+    """oai:repositorio.anid.cl:10533/12345 -> 10533/12345"""
+    return identifier.rsplit(":", 1)[-1]
+
+
+def handle_url(base_url, identifier):
+    """oai:repositorio.anid.cl:10533/12345 -> {base_url}/handle/10533/12345"""
+    return f"{base_url.rstrip('/')}/handle/{identifier_handle(identifier)}"
+
+
+def resolve_handle_url(client, base_url, handle):
+    """URL '/entities/{tipo}/{uuid}' del ítem con ese handle (la misma que guardan los modos selenium y api),
+       buscándolo en la API REST. Devuelve None si no se encuentra."""
+    try:
+        items, _ = client.search(f'handle:"{handle}"', size=1)
+    except DSpaceAPIError:
+        return None
+    for item in items:
+        if item.get("handle") == handle and item.get("uuid"):
+            return item_url(base_url, item)
+    return None
+
+
+def list_records(client, metadata_prefix="dim", from_date=None, until_date=None, oai_set=None):
+    """Recorre ListRecords siguiendo resumptionToken. Entrega (datestamp, identifier, metadata | None si fue eliminado)."""
+    params = {"verb": "ListRecords", "metadataPrefix": metadata_prefix}
+    if from_date:
+        params["from"] = from_date
+    if until_date:
+        params["until"] = until_date
+    if oai_set:
+        params["set"] = oai_set
+    parse = _parse_dim if metadata_prefix == "dim" else _parse_oai_dc
+
+    while True:
+        root = ET.fromstring(client.get_raw(OAI_ENDPOINT, params, accept="text/xml"))
+        error = root.find("oai:error", NAMESPACES)
+        if error is not None:
+            if error.get("code") == "noRecordsMatch":
+                return
+            raise OAIError(f"{error.get('code')}: {(error.text or '').strip()}")
+
+        list_element = root.find("oai:ListRecords", NAMESPACES)
+        if list_element is None:
+            return
+        for record in list_element.findall("oai:record", NAMESPACES):
+            header = record.find("oai:header", NAMESPACES)
+            identifier = header.findtext("oai:identifier", default="", namespaces=NAMESPACES)
+            datestamp = header.findtext("oai:datestamp", default="", namespaces=NAMESPACES)
+            metadata_element = record.find("oai:metadata", NAMESPACES)
+            if header.get("status") == "deleted" or metadata_element is None:
+                yield datestamp, identifier, None
+            else:
+                yield datestamp, identifier, parse(metadata_element)
+
+        token = list_element.findtext("oai:resumptionToken", default="", namespaces=NAMESPACES).strip()
+        if not token:
+            return
+        # Con resumptionToken no se repiten los demás argumentos
+        params = {"verb": "ListRecords", "resumptionToken": token}
+
+
+def matches_affiliation(metadata, terms):
+    text = " ".join(entry["value"] for values in metadata.values() for entry in values).lower()
+    return any(term in text for term in terms)
+
+
+def record_to_article(base_url, identifier, metadata, url=None):
+    """Mapea un registro OAI a las columnas del CSV. Sin 'url' (la del ítem ya guardado o resuelta en la API),
+       la URL se arma desde el handle del identificador OAI."""
+    return metadata_to_article(url or handle_url(base_url, identifier), metadata)
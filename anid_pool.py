@@ -0,0 +1,241 @@
+import queue
+import threading
+import time
+
+from anid_utils import safe_print
+
+# Pool de workers de Selenium: cada worker tiene su propio Chrome headless y su propio WebDriverWait.
+# Los workers solo extraen; la asignación de article_id, la deduplicación y el guardado
+# quedan en un único hilo escritor (el que consume los resultados).
+#
+# Un worker sin navegador no procesa enlaces: si Chrome no inicia o deja de responder, el worker lo
+# vuelve a crear (con un número acotado de intentos); si no lo logra, devuelve su enlace a la cola y
+# termina. "Sin navegador" nunca se informa como un error del artículo.
+
+_STOP = object()
+_NO_WORKERS = object()
+MAX_CRASHES_PER_LINK = 2   # un artículo que tumba el navegador esta cantidad de veces se informa como error
+
+
+def driver_responds(driver):
+    """True si la sesión de WebDriver sigue viva (el navegador responde a una consulta trivial)."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class RateLimiter:
+    """Intervalo mínimo entre aperturas de página, compartido por todos los workers (límite de cortesía)."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ArticleWorkerPool:
+    """N workers que toman URLs de una cola compartida y devuelven (link, article_data, error)."""
+
+    def __init__(self, num_workers, driver_factory, extract_fn, min_interval=0.0, driver_attempts=3,
+                 restart_delay=2.0):
+        self.driver_factory = driver_factory
+        self.extract_fn = extract_fn
+        self.limiter = RateLimiter(min_interval)
+        self.driver_attempts = driver_attempts
+        self.restart_delay = restart_delay
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._alive = num_workers
+        self._crashes = {}
+        self.threads = []
+        for worker_id in range(num_workers):
+            thread = threading.Thread(target=self._worker, args=(worker_id,), name=f"worker-{worker_id}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        safe_print(f"🧵 Pool iniciado con {num_workers} workers.")
+
+    def _start_driver(self, worker_id):
+        """Crea el navegador del worker con hasta 'driver_attempts' intentos. Devuelve (driver, wait) o None."""
+        for attempt in range(1, self.driver_attempts + 1):
+            try:
+                return self.driver_factory()
+            except Exception as e:
+                safe_print(f"❌ Worker {worker_id}: no se pudo iniciar Chrome "
+                           f"(intento {attempt}/{self.driver_attempts}): {str(e)}")
+            if attempt < self.driver_attempts:
+                time.sleep(self.restart_delay * attempt)
+        return None
+
+    def _worker(self, worker_id):
+        session = self._start_driver(worker_id)
+        try:
+            while session is not None:
+                link = self.tasks.get()
+                if link is _STOP:
+                    return
+                driver, wait = session
+                self.limiter.wait()
+                try:
+                    self.results.put((link, self.extract_fn(driver, wait, link), None))
+                except Exception as e:
+                    if driver_responds(driver):
+                        self.results.put((link, None, str(e)))
+                        continue
+                    # El navegador murió durante la extracción: el enlace vuelve a la cola sin contar como fallo,
+                    # salvo que sea él quien tumba el navegador una y otra vez
+                    safe_print(f"⚠️ Worker {worker_id}: el navegador dejó de responder; se vuelve a iniciar.")
+                    with self._lock:
+                        self._crashes[link] = crashes = self._crashes.get(link, 0) + 1
+                    if crashes >= MAX_CRASHES_PER_LINK:
+                        self.results.put((link, None, f"el navegador se cerró al extraer el artículo: {str(e)}"))
+                    else:
+                        self.tasks.put(link)
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    session = self._start_driver(worker_id)
+            safe_print(f"❌ Worker {worker_id}: sin navegador, el worker termina.")
+            with self._lock:
+                self._alive -= 1
+                if not self._alive:
+                    self.results.put(_NO_WORKERS)
+        finally:
+            if session is not None:
+                session[0].quit()
+
+    def submit(self, link):
+        self.tasks.put(link)
+
+    def next_result(self, block=True):
+        """Siguiente resultado (link, article_data, error). Sin bloquear, devuelve None si no hay ninguno listo.
+           Lanza RuntimeError si ningún worker pudo mantener un navegador."""
+        try:
+            result = self.results.get(block=block)
+        except queue.Empty:
+            return None
+        if result is _NO_WORKERS:
+            self.results.put(_NO_WORKERS)
+            raise RuntimeError("ningún worker del pool tiene un navegador disponible")
+        return result
+
+    def process(self, links):
+        """Encola los enlaces y entrega los resultados a medida que terminan (orden de finalización)."""
+        for link in links:
+            self.submit(link)
+        for _ in range(len(links)):
+            yield self.next_result()
+
+    def close(self):
+        for _ in self.threads:
+            self.tasks.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+
+
+class SearchPagePrefetcher:
+    """Recorre las páginas de búsqueda por delante del procesamiento de artículos, con N navegadores
+       propios que piden páginas consecutivas a la vez (hasta 'lookahead' páginas sin consumir).
+       Al iterarlo entrega (page, links) en orden de página y termina en la primera página vacía;
+       si una página falla, la excepción se propaga al iterar con el número de página en 'page'."""
+
+    def __init__(self, num_workers, driver_factory, fetch_fn, start_page, lookahead=None, shared_driver=None):
+        self.driver_factory = driver_factory
+        self.fetch_fn = fetch_fn
+        self.start_page = start_page
+        self.lookahead = lookahead or num_workers * 2
+        self._cond = threading.Condition()
+        self._next_page = start_page
+        self._consumed = start_page - 1
+        self._end_page = None   # primera página vacía o con error: no se piden páginas posteriores
+        self._results = {}
+        self._stopped = False
+        self._alive = num_workers
+        self.threads = []
+        for worker_id in range(num_workers):
+            # El primer worker puede usar un navegador ya abierto que de otro modo quedaría ocioso
+            driver = shared_driver if worker_id == 0 else None
+            thread = threading.Thread(target=self._worker, args=(worker_id, driver), name=f"listing-{worker_id}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _claim_page(self):
+        with self._cond:
+            while not self._stopped and self._next_page - self._consumed > self.lookahead:
+                self._cond.wait()
+            if self._stopped or (self._end_page is not None and self._next_page > self._end_page):
+                return None
+            page = self._next_page
+            self._next_page += 1
+            return page
+
+    def _worker(self, worker_id, shared_driver):
+        own_driver = shared_driver is None
+        driver = None
+        try:
+            driver, wait = shared_driver if shared_driver is not None else self.driver_factory()
+        except Exception as e:
+            safe_print(f"❌ Listado {worker_id}: no se pudo iniciar Chrome: {str(e)}")
+        try:
+            while driver is not None:
+                page = self._claim_page()
+                if page is None:
+                    break
+                try:
+                    links, error = self.fetch_fn(driver, wait, page), None
+                except Exception as e:
+                    links, error = None, e
+                with self._cond:
+                    self._results[page] = (links, error)
+                    if not links and (self._end_page is None or page < self._end_page):
+                        self._end_page = page
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._alive -= 1
+                self._cond.notify_all()
+            if driver is not None and own_driver:
+                driver.quit()
+
+    def __iter__(self):
+        page = self.start_page
+        while True:
+            with self._cond:
+                while page not in self._results and self._alive and not self._stopped:
+                    self._cond.wait()
+                if page not in self._results:
+                    if self._stopped:
+                        return
+                    error = RuntimeError("no quedan navegadores disponibles para recorrer las páginas de búsqueda")
+                    error.page = page
+                    raise error
+                links, error = self._results.pop(page)
+                self._consumed = page
+                self._cond.notify_all()
+            if error is not None:
+                error.page = page
+                raise error
+            yield page, links
+            if not links:
+                return
+            page += 1
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,263 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Cola de trabajo con arriendos (leases) en SQLite, para repartir un recorrido entre varios procesos
+# o máquinas que comparten el archivo de la cola.
+#
+# Unidades de trabajo:
+#   pages    -> una página de búsqueda (spc.page). Al procesarla se encolan sus artículos y, si no
+#               estaba vacía, la página 'window' posiciones más adelante (la ventana de páginas en curso).
+#   articles -> una URL de artículo. Su article_id se asigna al encolarla (clave primaria de la tabla),
+#               por lo que es único aunque la procesen varios workers, y el resultado se guarda en la cola.
+#
+# Un worker arrienda unidades por 'lease_seconds' y renueva el arriendo con un latido mientras trabaja.
+# Si muere, el arriendo vence y la unidad vuelve a quedar pendiente para otro worker.
+# El coordinador siembra la cola y va incorporando los resultados al journal y la base de estado locales.
+#
+# Sin WAL: el modo de journal por defecto de SQLite también funciona sobre un directorio compartido.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    links INTEGER
+);
+CREATE TABLE IF NOT EXISTS articles (
+    article_id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    data TEXT,
+    merged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pages_status ON pages(status);
+CREATE INDEX IF NOT EXISTS idx_articles_status ON articles(status);
+CREATE INDEX IF NOT EXISTS idx_articles_merged ON articles(merged, status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+TABLE_KEYS = {"pages": "page", "articles": "url"}
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+
+    def __init__(self, db_file, lease_seconds=120, max_attempts=3, max_failed_pages=3):
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_failed_pages = max_failed_pages
+        # El latido corre en otro hilo; las transacciones se serializan con el lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA busy_timeout = 60000")
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura al inicio: dos workers no arriendan la misma unidad
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # --- Metadatos ---
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # --- Siembra (coordinador) ---
+
+    def initialize(self, known_articles, window=8, start_page=1):
+        """Siembra una cola nueva: los artículos ya conocidos (url, article_id, status) con su ID y las
+           primeras 'window' páginas de búsqueda. Devuelve False si la cola ya estaba sembrada."""
+        def seed():
+            if self.conn.execute("SELECT value FROM meta WHERE key = 'window'").fetchone():
+                return False
+            # Primero los artículos con ID; los que no tienen (fallidos antes de asignarlo) reciben uno
+            # después de todos los conocidos, para no chocar con el ID de un artículo ya guardado
+            for url, article_id, status in sorted(known_articles, key=lambda row: row[1] is None):
+                # Los artículos ya guardados quedan terminados; los fallidos o incompletos se reintentan
+                queue_status = "done" if status == "done" else "pending"
+                if article_id is None:
+                    self.conn.execute("INSERT OR IGNORE INTO articles (url, status, merged) VALUES (?, ?, ?)",
+                                      (url, queue_status, int(queue_status == "done")))
+                else:
+                    self.conn.execute("INSERT OR IGNORE INTO articles (article_id, url, status, merged) "
+                                      "VALUES (?, ?, ?, ?)", (article_id, url, queue_status, int(queue_status == "done")))
+            self.conn.executemany("INSERT OR IGNORE INTO pages (page) VALUES (?)",
+                                  [(page,) for page in range(start_page, start_page + window)])
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('window', ?)", (str(window),))
+            return True
+        return self._transaction(seed)
+
+    # --- Arriendos ---
+
+    def _requeue_expired(self, table, now):
+        self.conn.execute(f"UPDATE {table} SET status = 'pending', owner = NULL "
+                          f"WHERE status = 'leased' AND lease_expires < ?", (now,))
+
+    def _claim(self, table, worker_id, limit):
+        key = TABLE_KEYS[table]
+        columns = "page" if table == "pages" else "url, article_id"
+
+        def claim():
+            now = time.time()
+            self._requeue_expired(table, now)
+            rows = self.conn.execute(f"SELECT {columns} FROM {table} WHERE status = 'pending' "
+                                     f"ORDER BY {'page' if table == 'pages' else 'article_id'} LIMIT ?",
+                                     (limit,)).fetchall()
+            self.conn.executemany(f"UPDATE {table} SET status = 'leased', owner = ?, lease_expires = ? WHERE {key} = ?",
+                                  [(worker_id, now + self.lease_seconds, row[0]) for row in rows])
+            return rows
+        return self._transaction(claim)
+
+    def claim_page(self, worker_id):
+        """Arrienda la página pendiente más baja. Devuelve su número o None."""
+        rows = self._claim("pages", worker_id, 1)
+        return rows[0][0] if rows else None
+
+    def claim_articles(self, worker_id, limit=10):
+        """Arrienda hasta 'limit' artículos pendientes. Devuelve una lista de (url, article_id)."""
+        return self._claim("articles", worker_id, limit)
+
+    def heartbeat(self, worker_id):
+        """Extiende los arriendos vigentes del worker."""
+        def extend():
+            expires = time.time() + self.lease_seconds
+            for table in TABLE_KEYS:
+                self.conn.execute(f"UPDATE {table} SET lease_expires = ? WHERE owner = ? AND status = 'leased'",
+                                  (expires, worker_id))
+        self._transaction(extend)
+
+    # --- Resultados ---
+
+    def complete_page(self, page, worker_id, links):
+        """Marca la página como terminada y encola sus artículos. Si trajo enlaces, encola la página
+           'window' posiciones más adelante para mantener la ventana de páginas en curso."""
+        window = int(self.get_meta("window", 1))
+
+        def complete():
+            self.conn.executemany("INSERT OR IGNORE INTO articles (url) VALUES (?)", [(link,) for link in links])
+            self.conn.execute("UPDATE pages SET status = 'done', owner = ?, links = ? WHERE page = ?",
+                              (worker_id, len(links), page))
+            if links:
+                self.conn.execute("INSERT OR IGNORE INTO pages (page) VALUES (?)", (page + window,))
+        self._transaction(complete)
+
+    def complete_article(self, url, worker_id, article_data):
+        def complete():
+            self.conn.execute("UPDATE articles SET status = 'done', owner = ?, data = ?, merged = 0 WHERE url = ?",
+                              (worker_id, json.dumps(article_data, ensure_ascii=False), url))
+        self._transaction(complete)
+
+    def _fail(self, table, key_value, error):
+        key = TABLE_KEYS[table]
+
+        def fail():
+            row = self.conn.execute(f"SELECT attempts, status FROM {table} WHERE {key} = ?", (key_value,)).fetchone()
+            if row and row[1] == "done":
+                # Otro worker la terminó después de que venciera este arriendo
+                return "done"
+            attempts = (row[0] if row else 0) + 1
+            status = "pending" if attempts < self.max_attempts else "failed"
+            self.conn.execute(f"UPDATE {table} SET status = ?, owner = NULL, attempts = ?, last_error = ? WHERE {key} = ?",
+                              (status, attempts, error, key_value))
+            if table == "pages" and status == "failed" and not self._failed_streak(key_value):
+                # No se sabe si la página tenía resultados: se sigue sondeando la ventana, salvo que las
+                # últimas 'max_failed_pages' páginas hayan fallado todas (el sitio no responde)
+                window = int(self.conn.execute("SELECT value FROM meta WHERE key = 'window'").fetchone()[0])
+                self.conn.execute("INSERT OR IGNORE INTO pages (page) VALUES (?)", (key_value + window,))
+            return status
+        return self._transaction(fail)
+
+    def _failed_streak(self, page):
+        """True si fallaron todas las páginas de page - max_failed_pages + 1 a page."""
+        failed = self.conn.execute("SELECT COUNT(*) FROM pages WHERE status = 'failed' AND page > ? AND page <= ?",
+                                   (page - self.max_failed_pages, page)).fetchone()[0]
+        return failed >= self.max_failed_pages
+
+    def fail_page(self, page, error):
+        return self._fail("pages", page, error)
+
+    def fail_article(self, url, error):
+        return self._fail("articles", url, error)
+
+    # --- Coordinador ---
+
+    def unmerged(self, limit=500):
+        """Resultados aún no incorporados: lista de (article_id, url, status, article_data | None, last_error)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT article_id, url, status, data, last_error FROM articles "
+                "WHERE merged = 0 AND status IN ('done', 'failed') ORDER BY article_id LIMIT ?", (limit,)).fetchall()
+        return [(article_id, url, status, json.loads(data) if data else None, last_error)
+                for article_id, url, status, data, last_error in rows]
+
+    def mark_merged(self, article_ids):
+        def mark():
+            self.conn.executemany("UPDATE articles SET merged = 1 WHERE article_id = ?", [(i,) for i in article_ids])
+        self._transaction(mark)
+
+    def counts(self):
+        """Cantidad de unidades por tabla y estado: {'pages': {'pending': 3, ...}, 'articles': {...}}."""
+        with self._lock:
+            return {table: dict(self.conn.execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status"))
+                    for table in TABLE_KEYS}
+
+    def finished(self):
+        """True cuando la cola está sembrada y no quedan unidades pendientes ni arrendadas."""
+        if self.get_meta("window") is None:
+            return False
+        counts = self.counts()
+        return not any(statuses.get(status) for statuses in counts.values() for status in ("pending", "leased"))
+
+
+class LeaseKeeper:
+    """Hilo de latido: renueva los arriendos del worker cada tercio del tiempo de arriendo."""
+
+    def __init__(self, queue, worker_id):
+        self.queue = queue
+        self.worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except sqlite3.Error:
+                # Cola bloqueada por otro proceso: se reintenta en el próximo latido
+                pass
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,93 @@
+import queue
+import re
+import threading
+from datetime import datetime
+
+from anid_api import DSpaceClient
+
+# Refresco incremental de los artículos ya guardados.
+#
+# Por cada URL guardada se consulta el ítem en la API REST (una petición JSON liviana, en paralelo y
+# sin caché) y se compara su lastModified con el registrado en el refresco anterior. Solo los ítems
+# modificados se convierten y, si su huella de contenido difiere de la guardada, se vuelven a anexar
+# con su article_id.
+#
+# Si el ítem nunca se refrescó, su lastModified solo cuenta como cambio si es posterior a la fecha en que
+# se guardó la fila; si no, se registra como línea base sin reescribir la fila. La huella de una fila del
+# modo selenium sale de los valores de la página y casi nunca coincide con la de la API, así que compararla
+# en el primer refresco reescribiría casi todo.
+#
+# Las URLs de handle (/handle/...) de la cosecha OAI no tienen UUID: las refresca --mode oai.
+
+UUID_PATTERN = re.compile(r"/(?:entities/[^/]+|items)/([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/?$",
+                          re.IGNORECASE)
+
+
+def item_uuid_from_url(url):
+    """UUID del ítem en una URL '/entities/{tipo}/{uuid}' o '/items/{uuid}', o None."""
+    match = UUID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def parse_timestamp(value):
+    """Fecha ISO 8601 de DSpace ('2024-01-05T12:34:56.789+00:00') o local sin zona ('2024-01-05T09:34:56').
+       Devuelve un datetime con zona horaria, o None si no se puede interpretar."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Las fechas sin zona son las de la base de estado, en hora local
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def is_modified(item_modified, stored_modified, saved_at):
+    """Indica si el ítem cambió desde el refresco anterior (o, sin refresco previo, desde que se guardó).
+       Sin refresco previo ni fechas comparables no se considera modificado: el lastModified actual
+       queda como línea base para el próximo refresco."""
+    if stored_modified:
+        return item_modified != stored_modified
+    item_time = parse_timestamp(item_modified)
+    saved_time = parse_timestamp(saved_at)
+    if item_time is None or saved_time is None:
+        return False
+    return item_time > saved_time
+
+
+def probe_items(base_url, uuids, workers=8, max_pending=256):
+    """Consulta los ítems en paralelo (un hilo y una conexión keep-alive por worker).
+       Entrega (uuid, item, error) en el orden en que terminan; 'item' es None si hubo error."""
+    pending = queue.Queue()
+    for uuid in uuids:
+        pending.put(uuid)
+    results = queue.Queue(maxsize=max_pending)
+
+    def worker():
+        # Sin caché: el refresco necesita el estado actual de cada ítem
+        client = DSpaceClient(base_url)
+        try:
+            while True:
+                try:
+                    uuid = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    results.put((uuid, client.get_item(uuid), None))
+                except Exception as e:
+                    results.put((uuid, None, e))
+        finally:
+            client.close()
+            results.put(None)
+
+    workers = max(1, min(workers, len(uuids)))
+    for i in range(workers):
+        threading.Thread(target=worker, name=f"refresh-{i}", daemon=True).start()
+
+    remaining = workers
+    while remaining:
+        result = results.get()
+        if result is None:
+            remaining -= 1
+        else:
+            yield result
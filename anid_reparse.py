@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from anid_utils import safe_print, configure_stdout, article_from_page_data, article_fingerprint
+from anid_snapshots import SnapshotStore, load_object
+from anid_state import StateStore
+from anid_writer import ArticleWriter
+
+# Re-derivación offline de articles_data.csv desde el almacén de snapshots, sin navegador ni red.
+# Usa la misma normalización que la extracción en vivo (anid_utils.article_from_page_data y el mapeo
+# de metadata de la API), por lo que un cambio en esas reglas se aplica volviendo a ejecutar este script:
+#
+#   python anid_reparse.py --snapshot-dir snapshots
+#
+# Los registros re-derivados que cambiaron se anexan al journal con su article_id y se registran en la
+# base de estado, como cualquier batch del scraper; las filas sin snapshot quedan como estaban. Al final
+# se compacta el CSV consolidado. No debe ejecutarse mientras el scraper escribe en el mismo directorio.
+
+
+def _text(element):
+    # Equivalente aproximado de .text de Selenium: texto visible con espacios colapsados
+    return " ".join(element.text_content().split()) if element is not None else ""
+
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def parse_html(link, html):
+    """Extrae de un HTML renderizado los mismos campos que anid_selenium.extract_article, con lxml."""
+    from lxml import html as lxml_html
+
+    doc = lxml_html.fromstring(html)
+    page_data = {
+        "title": _text(_first(doc.xpath(f"//h2[{_has_class('heading')}]"))),
+        "authors": [_text(span) for span in doc.xpath(f"//div[{_has_class('authority')}]//span")],
+        "date": _text(_first(doc.xpath(f"//div[{_has_class('date')}]"))),
+        "abstract": _text(_first(doc.xpath(f"//div[{_has_class('abstract-text')}]"))),
+        "rows": [],
+    }
+    table = _first(doc.xpath("//ds-themed-full-item-page//table"))
+    if table is not None:
+        for row in table.xpath(".//tbody/tr"):
+            cells = row.xpath(".//td")
+            if len(cells) >= 2:
+                page_data["rows"].append([_text(cells[0]), _text(cells[1])])
+    return article_from_page_data(link, page_data)
+
+
+def parse_json(link, content):
+    from anid_api import metadata_to_article
+
+    item = json.loads(content)
+    return metadata_to_article(link, item.get("metadata", {}), item.get("name"))
+
+
+def reparse_snapshot(task):
+    """Trabajo de un proceso del pool: (root, url, kind, sha256) -> article_data o None si falla."""
+    root, url, kind, sha256 = task
+    try:
+        content = load_object(root, sha256).decode("utf-8")
+        if kind == "json":
+            return parse_json(url, content)
+        return parse_html(url, content)
+    except Exception as e:
+        safe_print(f"⚠️ No se pudo re-derivar {url}: {str(e)}")
+        return None
+
+
+def reparse(snapshot_dir, csv_file, state_db_file, workers=None, batch_size=500):
+    """Re-deriva los snapshots y guarda los registros que cambiaron. Devuelve la cantidad de registros actualizados."""
+    store = SnapshotStore(snapshot_dir)
+    snapshots = store.latest()
+    store.close()
+    safe_print(f"🗂️ {len(snapshots)} snapshots para re-derivar con {workers or os.cpu_count()} procesos...")
+
+    writer = ArticleWriter(csv_file, compact_every=0)
+    state = StateStore(state_db_file)
+    state.sync_with_journal(writer)
+    # article_id y huella de cada fila guardada: se conserva el ID y se omiten los registros sin cambios
+    article_ids = {url: article_id for url, article_id, _ in state.articles() if article_id is not None}
+    fingerprints = {row[0]: row[3] for row in state.refresh_candidates()}
+    next_id = state.max_article_id()
+
+    start = time.monotonic()
+    updated = unchanged = 0
+    batch = []
+
+    def save():
+        writer.append(batch)
+        state.record_batch(batch, writer.committed_bytes)
+        batch.clear()
+
+    tasks = [(snapshot_dir, url, kind, sha256) for url, kind, sha256 in snapshots]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for article_data in executor.map(reparse_snapshot, tasks, chunksize=64):
+                if article_data is None:
+                    continue
+                if article_fingerprint(article_data) == fingerprints.get(article_data["URL"]):
+                    unchanged += 1
+                    continue
+                article_id = article_ids.get(article_data["URL"])
+                if article_id is None:
+                    next_id += 1
+                    article_id = next_id
+                article_data["article_id"] = article_id
+                batch.append(article_data)
+                updated += 1
+                if len(batch) >= batch_size:
+                    save()
+        if batch:
+            save()
+        writer.compact()
+    finally:
+        state.close()
+    safe_print(f"📁 {updated} registros re-derivados actualizados y {unchanged} sin cambios "
+               f"en '{csv_file}' ({time.monotonic() - start:.1f} s).")
+    return updated
+
+
+if __name__ == "__main__":
+    configure_stdout()
+    parser = argparse.ArgumentParser(description="Re-deriva articles_data.csv desde los snapshots guardados, sin red")
+    parser.add_argument("--snapshot-dir", default="snapshots", help="Directorio del almacén de snapshots")
+    parser.add_argument("--csv", default="articles_data.csv",
+                        help="CSV consolidado del scraper (se actualiza a través de su journal)")
+    parser.add_argument("--state-db", default="scraper_state.db",
+                        help="Base de estado del scraper, para conservar los article_id asignados")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    args = parser.parse_args()
+    reparse(args.snapshot_dir, args.csv, args.state_db, args.workers)
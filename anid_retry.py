@@ -0,0 +1,140 @@
+import heapq
+import random
+import threading
+import time
+from collections import deque
+
+from anid_utils import safe_print
+from anid_metrics import metrics
+
+# Reintentos dentro de la misma ejecución y corte de circuito ante ráfagas de errores del sitio.
+#
+# RetryScheduler: cola de reintentos diferidos. Cada URL fallida vuelve a procesarse tras una espera
+#   exponencial (base * 2^(intento-1), con tope) con jitter, hasta agotar sus intentos.
+# CircuitBreaker: si la tasa de errores de las últimas N extracciones supera el umbral, se pausan
+#   todas las aperturas de página durante un enfriamiento; luego una sola prueba decide si se reanuda
+#   o si se vuelve a pausar con el doble de espera.
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Espera antes del intento 'attempt' + 1: exponencial con tope y jitter (entre la mitad y el total)."""
+    delay = min(max_delay, base_delay * 2 ** max(attempt - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryScheduler:
+
+    def __init__(self, max_attempts=3, base_delay=5.0, max_delay=300.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap = []
+        self._scheduled = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, link, attempts):
+        """Programa un reintento tras 'attempts' intentos fallidos. Devuelve la espera en segundos,
+           o None si la URL agotó sus intentos o ya estaba programada."""
+        if attempts >= self.max_attempts or link in self._scheduled:
+            return None
+        delay = backoff_delay(attempts, self.base_delay, self.max_delay)
+        heapq.heappush(self._heap, (time.monotonic() + delay, link))
+        self._scheduled.add(link)
+        return delay
+
+    def schedule_now(self, link):
+        if link not in self._scheduled:
+            heapq.heappush(self._heap, (time.monotonic(), link))
+            self._scheduled.add(link)
+
+    def due(self):
+        """Saca de la cola las URLs cuyo reintento ya venció."""
+        now = time.monotonic()
+        links = []
+        while self._heap and self._heap[0][0] <= now:
+            _, link = heapq.heappop(self._heap)
+            self._scheduled.discard(link)
+            links.append(link)
+        return links
+
+    def wait_next(self):
+        """Espera hasta el próximo reintento programado y devuelve las URLs vencidas."""
+        if self._heap:
+            time.sleep(max(0.0, self._heap[0][0] - time.monotonic()))
+        return self.due()
+
+
+class CircuitBreaker:
+
+    def __init__(self, threshold=0.5, window=20, min_samples=10, cooldown=60.0, max_cooldown=600.0):
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self._results = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._open_until = 0.0
+        self._half_open = False
+        self._probe = None
+
+    def wait(self):
+        """Bloquea mientras el circuito está abierto. En semiabierto deja pasar una sola prueba.
+           Devuelve un token que se pasa a record() junto con el resultado de esa extracción."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._open_until:
+                    delay = self._open_until - now
+                elif self._half_open and self._probe is not None:
+                    delay = 0.5
+                else:
+                    token = object()
+                    if self._half_open:
+                        self._probe = token
+                    return token
+            time.sleep(delay)
+
+    def record(self, success, token=None):
+        with self._lock:
+            if self._half_open:
+                if token is None or token is not self._probe:
+                    # Resultado de una extracción que empezó antes de la pausa, no de la prueba
+                    return
+                self._half_open = False
+                self._probe = None
+                if success:
+                    safe_print("🟢 Circuito cerrado: el sitio volvió a responder.")
+                    self.cooldown = self.base_cooldown
+                    self._results.clear()
+                else:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self._open()
+                return
+            self._results.append(success)
+            failures = self._results.count(False)
+            if len(self._results) >= self.min_samples and failures / len(self._results) >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self._open_until = time.monotonic() + self.cooldown
+        self._half_open = True
+        self._results.clear()
+        metrics.incr("circuit_open")
+        safe_print(f"🔴 Circuito abierto por ráfaga de errores: se pausan las extracciones {self.cooldown:.0f} s.")
+
+
+def with_circuit_breaker(extract_fn, breaker):
+    """Envuelve una función de extracción: espera si el circuito está abierto y registra el resultado."""
+    def extract(driver, wait, link):
+        token = breaker.wait()
+        try:
+            article_data = extract_fn(driver, wait, link)
+        except Exception:
+            breaker.record(False, token)
+            raise
+        breaker.record(True, token)
+        return article_data
+    return extract
@@ -0,0 +1,296 @@
+import itertools
+import os
+import shutil
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, SessionNotCreatedException
+
+from anid_utils import safe_print, new_article_data, merge_metadata_row, finalize_article, article_from_page_data
+from anid_wait import wait_for_item_page, wait_for_table
+from anid_metrics import metrics
+
+# Motor de extracción con Chrome headless (Selenium)
+
+FULL_PAGE_BUTTON_XPATH = "//a[contains(text(),'Página completa del artículo')]"
+FULL_ITEM_TABLE_XPATH = "//ds-themed-full-item-page//table"
+WAIT_TIMEOUT = 40
+
+# Ruta del chromedriver resuelta en una ejecución anterior: evita consultar la red en cada inicio
+DRIVER_CACHE_FILE = "chromedriver_path.txt"
+
+# Perfil "lean": recursos que el scraper no necesita para leer el contenido de ds-app.
+# Se bloquean con Network.setBlockedURLs (CDP) antes de cada carga de página.
+BLOCKED_URL_PATTERNS = [
+    # Imágenes, íconos y miniaturas de bitstreams
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*/bitstreams/*/content*", "*/thumbnail*",
+    # Fuentes y multimedia
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.webm", "*.mp3",
+    # Analítica y widgets de terceros
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*altmetric.com*", "*plu.mx*",
+    "*dimensions.ai*", "*addthis.com*", "*hotjar.com*", "*matomo*",
+]
+
+# Extracción completa del artículo en una sola llamada a execute_script: título, autores, fecha,
+# resumen y todas las filas de la tabla de metadata (mismos selectores que la extracción por elementos)
+EXTRACT_ARTICLE_JS = """
+var text = function (el) { return el ? (el.innerText || el.textContent || "").trim() : ""; };
+var data = {
+    title: text(document.querySelector("h2.heading")),
+    authors: Array.prototype.map.call(document.querySelectorAll("div.authority span"), text),
+    date: text(document.querySelector("div.date")),
+    abstract: text(document.querySelector("div.abstract-text")),
+    table: false,
+    rows: []
+};
+var table = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (table) {
+    data.table = true;
+    table.querySelectorAll("tbody > tr").forEach(function (row) {
+        var cells = row.querySelectorAll("td");
+        if (cells.length >= 2) {
+            data.rows.push([text(cells[0]), text(cells[1])]);
+        }
+    });
+}
+return data;
+"""
+
+
+def chrome_arguments(lean=False, cache_dir=None):
+    """Argumentos de línea de comandos de Chrome (los comparten create_driver y anid_browser_daemon)."""
+    arguments = [
+        "--headless=new",
+        "--disable-gpu",
+        "--no-sandbox",
+        "--window-size=1366,768",
+        "--start-maximized",
+        "--disable-blink-features=AutomationControlled",
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "--lang=es-ES.UTF-8",
+    ]
+    if lean:
+        arguments += [
+            "--blink-settings=imagesEnabled=false",
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--mute-audio",
+        ]
+        if cache_dir:
+            # Caché en disco persistente entre ejecuciones para el bundle de Angular (JS/CSS)
+            arguments.append(f"--disk-cache-dir={os.path.abspath(cache_dir)}")
+    return arguments
+
+
+def build_chrome_options(lean=False, cache_dir=None):
+    # Configuración de Chrome
+    chrome_options = Options()
+    for argument in chrome_arguments(lean, cache_dir):
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    if lean:
+        # No esperar imágenes ni subrecursos: el DOM de ds-app se arma con el bundle de Angular
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+
+def resolve_driver_path(cache_file=DRIVER_CACHE_FILE, refresh=False):
+    """Ruta del chromedriver sin ir a la red cuando es posible: la guardada en cache_file por una ejecución
+       anterior o, si no hay (o refresh=True), la que resuelve webdriver_manager consultando la versión en la
+       red. Sin red, se usa el chromedriver del PATH. La ruta resuelta queda guardada para el próximo inicio."""
+    if not refresh and os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as f:
+            path = f.read().strip()
+        if path and os.path.exists(path):
+            return path
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        path = shutil.which("chromedriver")
+        if not path:
+            raise
+        safe_print(f"⚠️ No se pudo resolver el chromedriver ({str(e)}). Se usa el del PATH: {path}")
+    with open(cache_file, "w", encoding="utf-8") as f:
+        f.write(path)
+    return path
+
+
+_driver_path = None
+_driver_lock = threading.Lock()
+_driver_counter = itertools.count()
+# Direcciones del daemon de navegadores con una sesión abierta en este proceso
+_attached = set()
+
+
+class AttachedChrome(webdriver.Chrome):
+    """Sesión sobre un Chrome del daemon de navegadores: quit() libera el navegador pero no lo cierra."""
+
+    debugger_address = None
+
+    def quit(self):
+        try:
+            self.service.stop()
+        finally:
+            with _driver_lock:
+                _attached.discard(self.debugger_address)
+
+
+def _start_chrome(driver_class, options, driver_path=None):
+    global _driver_path
+    # El chromedriver se resuelve una sola vez por proceso, aunque se creen varios navegadores
+    with _driver_lock:
+        if _driver_path is None:
+            _driver_path = driver_path or resolve_driver_path()
+        path = _driver_path
+    try:
+        return driver_class(service=Service(path), options=options)
+    except SessionNotCreatedException:
+        if driver_path:
+            raise
+        # El chromedriver guardado ya no corresponde a la versión instalada de Chrome: se resuelve de nuevo
+        safe_print("⚠️ No se pudo iniciar Chrome con el chromedriver guardado. Resolviendo la versión actual...")
+        with _driver_lock:
+            if _driver_path == path:
+                _driver_path = resolve_driver_path(refresh=True)
+            path = _driver_path
+        return driver_class(service=Service(path), options=options)
+
+
+def _claim_debugger_address(debugger_addresses):
+    from anid_browser_daemon import browser_alive
+    with _driver_lock:
+        free = [address for address in debugger_addresses or [] if address not in _attached]
+    for address in free:
+        if browser_alive(address):
+            with _driver_lock:
+                if address not in _attached:
+                    _attached.add(address)
+                    return address
+    return None
+
+
+def create_driver(lean=False, cache_dir=None, driver_path=None, debugger_addresses=None):
+    """Crea una instancia de Chrome headless y su WebDriverWait. Devuelve (driver, wait).
+       Con lean=True usa el perfil liviano: carga 'eager', sin imágenes, fuentes ni terceros,
+       y una caché en disco propia de cada navegador dentro de cache_dir.
+       driver_path fija el chromedriver; sin él se usa el guardado en DRIVER_CACHE_FILE.
+       Con debugger_addresses (host:puerto de los navegadores de anid_browser_daemon) se conecta
+       a uno libre y ya iniciado; si no queda ninguno, inicia un Chrome nuevo."""
+    address = _claim_debugger_address(debugger_addresses) if debugger_addresses else None
+    if address:
+        options = Options()
+        options.debugger_address = address
+        if lean:
+            options.page_load_strategy = "eager"
+        try:
+            driver = _start_chrome(AttachedChrome, options, driver_path)
+        except Exception:
+            with _driver_lock:
+                _attached.discard(address)
+            raise
+        driver.debugger_address = address
+        safe_print(f"♨️ Conectado al navegador del daemon en {address}")
+    else:
+        with _driver_lock:
+            driver_index = next(_driver_counter)
+        browser_cache_dir = None
+        if lean and cache_dir:
+            # Un directorio por navegador: Chrome no admite dos procesos sobre la misma caché
+            browser_cache_dir = os.path.join(cache_dir, f"browser-{driver_index}")
+            os.makedirs(browser_cache_dir, exist_ok=True)
+        driver = _start_chrome(webdriver.Chrome, build_chrome_options(lean, browser_cache_dir), driver_path)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver, WebDriverWait(driver, WAIT_TIMEOUT)
+
+
+def open_full_item_page(driver, wait, link):
+    """Abre el artículo y, si existe, hace clic en 'Página completa del artículo'.
+       Las esperas terminan apenas aparece el botón o la tabla, o cuando Angular queda estable sin ellos."""
+    with metrics.timer("item_get"):
+        driver.get(link)
+    safe_print(f"🔍 Abriendo artículo: {link}")
+    try:
+        page_state = wait_for_item_page(driver, FULL_PAGE_BUTTON_XPATH, FULL_ITEM_TABLE_XPATH)
+    except TimeoutException:
+        page_state = None
+    if page_state == "table":
+        return
+    if page_state == "button":
+        try:
+            full_page_button = driver.find_element(By.XPATH, FULL_PAGE_BUTTON_XPATH)
+            driver.execute_script("arguments[0].scrollIntoView(true);", full_page_button)
+            driver.execute_script("arguments[0].click();", full_page_button)
+            wait_for_table(driver, FULL_ITEM_TABLE_XPATH)
+            safe_print("✔ Botón 'Página completa' clickeado.")
+            return
+        except TimeoutException:
+            pass
+    safe_print("⚠ No se encontró el botón 'Página completa'. Extrayendo metadata directamente.")
+
+
+def extract_article(driver, wait, link):
+    """Extrae la metadata del artículo en 'link'. Devuelve el diccionario 'article_data' sin article_id."""
+    open_full_item_page(driver, wait, link)
+    with metrics.timer("extract"):
+        return _extract_article_dom(driver, link)
+
+
+def _extract_article_dom(driver, link):
+    # Inicializar diccionario de datos del artículo
+    article_data = new_article_data(link)
+
+    try:
+        article_data["dc.title"] = driver.find_element(By.CSS_SELECTOR, "h2.heading").text.strip()
+    except Exception:
+        article_data["dc.title"] = ""
+
+    try:
+        autores = driver.find_elements(By.CSS_SELECTOR, "div.authority span")
+        if autores:
+            article_data["dc.creator"] = autores[0].text.strip()
+            for autor in autores:
+                article_data["dc.contributor"].append(autor.text.strip())
+    except Exception:
+        pass
+
+    try:
+        article_data["dc.date"] = driver.find_element(By.CSS_SELECTOR, "div.date").text.strip()
+    except Exception:
+        pass
+
+    try:
+        article_data["dc.description.abstract"] = driver.find_element(By.CSS_SELECTOR, "div.abstract-text").text.strip()[:500]
+    except Exception:
+        pass
+
+    # Extraer metadata de la tabla
+    try:
+        metadata_table = driver.find_element(By.XPATH, FULL_ITEM_TABLE_XPATH)
+        rows = metadata_table.find_elements(By.XPATH, ".//tbody/tr")
+        for row in rows:
+            cells = row.find_elements(By.TAG_NAME, "td")
+            if len(cells) >= 2:
+                merge_metadata_row(article_data, cells[0].text, cells[1].text)
+    except Exception as e:
+        safe_print(f"⚠️ No se pudo extraer la metadata completa de la tabla en {link}: {str(e)}")
+
+    return finalize_article(article_data)
+
+
+def extract_article_js(driver, wait, link):
+    """Igual que extract_article, pero obtiene toda la página en un único viaje de ida y vuelta al navegador."""
+    open_full_item_page(driver, wait, link)
+    with metrics.timer("extract"):
+        page_data = driver.execute_script(EXTRACT_ARTICLE_JS, FULL_ITEM_TABLE_XPATH)
+    if not page_data.get("table"):
+        safe_print(f"⚠️ No se pudo extraer la metadata completa de la tabla en {link}: tabla no encontrada")
+    return article_from_page_data(link, page_data)
@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Almacén de snapshots de respuestas crudas (HTML renderizado o JSON de la API), para poder volver a
+# derivar articles_data.csv sin navegador ni red (ver anid_reparse.py).
+#
+# Los contenidos se guardan comprimidos con gzip y direccionados por su SHA-256
+# (snapshots/objects/ab/abcdef....gz), por lo que un mismo contenido se guarda una sola vez.
+# El índice snapshots/index.db relaciona cada URL y fecha de obtención con su contenido.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (url, fetched_at)
+);
+"""
+
+
+def object_path(root, sha256):
+    return os.path.join(root, "objects", sha256[:2], sha256 + ".gz")
+
+
+def load_object(root, sha256):
+    with gzip.open(object_path(root, sha256), "rb") as f:
+        return f.read()
+
+
+class SnapshotStore:
+
+    def __init__(self, root="snapshots"):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        # Los workers del pool guardan snapshots desde sus propios hilos
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save(self, url, content, kind):
+        """Guarda el contenido ('html' o 'json') de una URL con la fecha actual. Devuelve su SHA-256."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = object_path(self.root, sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO snapshots (url, fetched_at, kind, sha256, size) VALUES (?, ?, ?, ?, ?)",
+                              (url, datetime.now().isoformat(timespec="microseconds"), kind, sha256, len(content)))
+        return sha256
+
+    def latest(self):
+        """Último snapshot de cada URL: lista de (url, kind, sha256), en orden de primera obtención."""
+        with self._lock:
+            return self.conn.execute(
+                """SELECT s.url, s.kind, s.sha256 FROM snapshots s
+                   JOIN (SELECT url, MAX(fetched_at) AS last, MIN(fetched_at) AS first FROM snapshots GROUP BY url) l
+                     ON s.url = l.url AND s.fetched_at = l.last
+                   ORDER BY l.first""").fetchall()
+
+    def load(self, sha256):
+        return load_object(self.root, sha256)
+
+
+def with_snapshots(extract_fn, store):
+    """Envuelve una función de extracción de Selenium para guardar el HTML renderizado de cada artículo."""
+    def extract(driver, wait, link):
+        article_data = extract_fn(driver, wait, link)
+        store.save(link, driver.page_source, "html")
+        return article_data
+    return extract
@@ -0,0 +1,259 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from anid_utils import safe_print, article_fingerprint, article_handle
+
+# Estado de la ejecución en una base SQLite embebida: URLs procesadas (con estado, intentos y fechas),
+# checkpoint de página y posición confirmada del journal de artículos.
+#
+# Estados de una URL:
+#   pending    -> encontrada en una página de búsqueda, aún sin extraer
+#   done       -> guardada con dc.title y dc.date
+#   incomplete -> guardada, pero sin dc.title o sin dc.date
+#   failed     -> la extracción terminó con error
+#
+# Cada URL guardada lleva la huella de su fila en el CSV (fingerprint) y, tras un refresco con la API,
+# el lastModified del ítem en DSpace, para que un refresco solo reescriba las filas que cambiaron.
+# También guarda el handle del ítem, con el que la cosecha OAI reconoce las filas guardadas por URL '/entities/...'.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    article_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    fingerprint TEXT,
+    last_modified TEXT,
+    handle TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_urls_status ON urls(status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+PROCESSED_STATUSES = ("done", "incomplete")
+
+# Columnas agregadas después de la primera versión del esquema (se crean en bases existentes al abrir)
+ADDED_COLUMNS = {"fingerprint": "TEXT", "last_modified": "TEXT", "handle": "TEXT"}
+# Columnas que se calculan desde el journal para las filas guardadas antes de que existieran
+BACKFILLED_COLUMNS = ("fingerprint", "handle")
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _article_id(value):
+    # Los CSV generados con pandas pueden traer los IDs como '12.0'
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class StateStore:
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(urls)")}
+        with self.conn:
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE urls ADD COLUMN {column} {column_type}")
+                    if column in BACKFILLED_COLUMNS:
+                        # Los valores de las filas ya guardadas se calculan desde el journal al sincronizar
+                        self._set_meta("backfill_pending", 1)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_handle ON urls(handle)")
+
+    def close(self):
+        self.conn.close()
+
+    # --- Metadatos ---
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self._set_meta(key, value)
+
+    # --- Checkpoint de página ---
+
+    def load_checkpoint_page(self):
+        return int(self.get_meta("checkpoint_page", 1))
+
+    def update_checkpoint_page(self, page):
+        self.set_meta("checkpoint_page", page)
+
+    # --- URLs ---
+
+    def is_processed(self, url):
+        row = self.conn.execute("SELECT status FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] in PROCESSED_STATUSES
+
+    def filter_new(self, links):
+        """Devuelve los enlaces que aún no están guardados (una sola consulta por página)."""
+        if not links:
+            return []
+        placeholders = ",".join("?" * len(links))
+        processed = {row[0] for row in self.conn.execute(
+            f"SELECT url FROM urls WHERE url IN ({placeholders}) AND status IN ('done', 'incomplete')", list(links))}
+        return [link for link in links if link not in processed]
+
+    def article_id(self, url):
+        row = self.conn.execute("SELECT article_id FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def max_article_id(self):
+        row = self.conn.execute("SELECT MAX(article_id) FROM urls").fetchone()
+        return row[0] or 0
+
+    def attempts(self, url):
+        row = self.conn.execute("SELECT attempts FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else 0
+
+    def count_status(self, status):
+        return self.conn.execute("SELECT COUNT(*) FROM urls WHERE status = ?", (status,)).fetchone()[0]
+
+    def articles(self):
+        """Todas las URLs registradas: lista de (url, article_id, status)."""
+        return self.conn.execute("SELECT url, article_id, status FROM urls ORDER BY article_id").fetchall()
+
+    def refresh_candidates(self):
+        """URLs guardadas en el CSV: lista de (url, article_id, updated_at, fingerprint, last_modified)."""
+        return self.conn.execute(
+            "SELECT url, article_id, updated_at, fingerprint, last_modified FROM urls "
+            "WHERE status IN ('done', 'incomplete') ORDER BY article_id").fetchall()
+
+    def url_for_handle(self, handle):
+        """URL con la que se guardó el ítem de ese handle, o None."""
+        row = self.conn.execute("SELECT url FROM urls WHERE handle = ? ORDER BY article_id LIMIT 1", (handle,)).fetchone()
+        return row[0] if row else None
+
+    def set_last_modified(self, pairs):
+        """Guarda el lastModified de DSpace de cada URL: lista de (url, last_modified)."""
+        with self.conn:
+            self.conn.executemany("UPDATE urls SET last_modified = ? WHERE url = ?",
+                                  [(last_modified, url) for url, last_modified in pairs])
+
+    def links_to_reprocess(self, max_attempts=3):
+        """Enlaces con error o guardados sin dc.title/dc.date, que aún no agotan sus intentos, y enlaces
+           que quedaron 'pending' porque una ejecución anterior se interrumpió antes de guardarlos."""
+        return [row[0] for row in self.conn.execute(
+            "SELECT url FROM urls WHERE status IN ('failed', 'incomplete', 'pending') AND attempts < ? ORDER BY updated_at",
+            (max_attempts,))]
+
+    def mark_pending(self, links):
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, status, created_at, updated_at) VALUES (?, 'pending', ?, ?)",
+                [(link, now, now) for link in links])
+
+    def mark_failed(self, url, error=""):
+        now = _now()
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO urls (url, status, attempts, last_error, created_at, updated_at)
+                   VALUES (?, 'failed', 1, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       status = CASE WHEN status IN ('done', 'incomplete') THEN status ELSE 'failed' END,
+                       attempts = attempts + 1, last_error = excluded.last_error, updated_at = excluded.updated_at""",
+                (url, error, now, now))
+
+    def _record(self, articles, now):
+        self.conn.executemany(
+            """INSERT INTO urls (url, status, article_id, attempts, created_at, updated_at, fingerprint, handle)
+               VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET
+                   status = excluded.status, article_id = excluded.article_id, attempts = attempts + 1,
+                   last_error = NULL, updated_at = excluded.updated_at, fingerprint = excluded.fingerprint,
+                   handle = COALESCE(excluded.handle, handle)""",
+            [(article["URL"],
+              "done" if article.get("dc.title") and article.get("dc.date") else "incomplete",
+              _article_id(article["article_id"]), now, now, article_fingerprint(article), article_handle(article))
+             for article in articles])
+
+    def record_batch(self, articles, journal_bytes, checkpoint_page=None):
+        """Registra un batch ya anexado al journal, junto con la posición confirmada del journal y, si se
+           indica, el checkpoint de la última página cuyos artículos quedan todos guardados, en una transacción."""
+        with self.conn:
+            self._record(articles, _now())
+            self._set_meta("journal_bytes", journal_bytes)
+            if checkpoint_page is not None:
+                self._set_meta("checkpoint_page", checkpoint_page)
+
+    # --- Inicialización y reconciliación ---
+
+    def sync_with_journal(self, writer, checkpoint_file=None, error_file=None):
+        """Incorpora los registros del journal que la base aún no conoce: todo el journal en el primer inicio
+           (junto con checkpoint_page.txt y error_links.txt) o el último batch si el proceso se interrumpió
+           entre el journal y la base."""
+        first_run = self.get_meta("journal_bytes") is None
+        start = int(self.get_meta("journal_bytes", 0))
+        if writer.committed_bytes < start:
+            # El journal se reemplazó por uno más corto: reconstruir desde cero
+            start = 0
+        if writer.committed_bytes > start:
+            now = _now()
+            count = 0
+            with self.conn:
+                batch = []
+                for record in writer.iter_records(start):
+                    batch.append(record)
+                    if len(batch) >= 1000:
+                        self._record(batch, now)
+                        count += len(batch)
+                        batch = []
+                self._record(batch, now)
+                count += len(batch)
+                self._set_meta("journal_bytes", writer.committed_bytes)
+            safe_print(f"🗃️ Estado sincronizado con el journal: {count} registros incorporados.")
+        elif first_run:
+            self.set_meta("journal_bytes", writer.committed_bytes)
+
+        if self.get_meta("backfill_pending"):
+            self._backfill_columns(writer)
+
+        if first_run:
+            if checkpoint_file and os.path.exists(checkpoint_file):
+                with open(checkpoint_file, "r", encoding="utf-8") as f:
+                    try:
+                        self.update_checkpoint_page(int(f.read().strip()))
+                    except ValueError:
+                        pass
+            if error_file and os.path.exists(error_file):
+                with open(error_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            self.mark_failed(line.strip(), "importado de error_links.txt")
+                safe_print(f"🗃️ Enlaces de error importados desde '{error_file}'.")
+
+    def _backfill_columns(self, writer):
+        """Calcula la huella y el handle de las filas guardadas antes de que existieran esas columnas
+           (desde la última versión de cada URL en el journal)."""
+        values = {}
+        for record in writer.iter_records():
+            values[record["URL"]] = (article_fingerprint(record), article_handle(record))
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE urls SET fingerprint = COALESCE(fingerprint, ?), handle = COALESCE(handle, ?) WHERE url = ?",
+                [(fingerprint, handle, url) for url, (fingerprint, handle) in values.items()])
+            self.conn.execute("DELETE FROM meta WHERE key = 'backfill_pending'")
+        safe_print(f"🗃️ Huellas de contenido y handles calculados para {len(values)} artículos guardados.")
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+import sys
+
+# Utilidades compartidas por los distintos motores de extracción
+
+# Handle de un ítem (prefijo/sufijo) en dc.identifier.uri ('https://hdl.handle.net/10533/123') o en una URL '/handle/10533/123'
+HANDLE_PATTERN = re.compile(r"(?:hdl\.handle\.net/|/handle/)(\d[\w.]*/[\w.\-]+)")
+
+
+def safe_print(text):
+    try:
+        print(text)
+    except UnicodeEncodeError:
+        print(text.encode('ascii', errors='replace').decode('ascii'))
+
+
+def configure_stdout():
+    # Configuración de encoding para Windows
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+
+def new_article_data(link):
+    """Diccionario base de un artículo, con las mismas columnas iniciales que usa el scraper de Selenium."""
+    return {
+        "article_id": None,  # Se asignará luego
+        "URL": link,
+        "dc.contributor": [],
+        "dc.creator": "",
+        "dc.date": "",
+        "dc.description.abstract": ""
+    }
+
+
+def normalize_key(key):
+    """Normaliza la clave de una fila de la tabla de metadata (sin dos puntos y con puntos en vez de espacios)."""
+    return key.strip().replace(":", "").replace(" ", ".")
+
+
+def merge_metadata_row(article_data, key, value):
+    """Incorpora una fila clave/valor de la tabla de metadata con la misma semántica que la tabla HTML:
+       las claves que ya son listas acumulan valores y el resto se sobrescribe."""
+    key = normalize_key(key)
+    value = value.strip()
+    if key and value:
+        if key in article_data and isinstance(article_data[key], list):
+            article_data[key].append(value)
+        else:
+            article_data[key] = value
+
+
+def article_handle(article_data):
+    """Handle del artículo según dc.identifier.uri, dc.identifier o su URL, o None si no tiene."""
+    for key in ("dc.identifier.uri", "dc.identifier", "URL"):
+        match = HANDLE_PATTERN.search(article_data.get(key) or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+def article_fingerprint(article_data):
+    """Huella del contenido de un artículo (sin article_id), para detectar cambios entre recorridos.
+       Las columnas vacías no cuentan: una fila del journal y un diccionario recién extraído coinciden."""
+    content = {key: str(value) for key, value in article_data.items()
+               if key != "article_id" and value not in ("", None, [])}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def finalize_article(article_data):
+    """Convierte todas las listas a cadenas separadas por comas (para todas las claves)."""
+    for key, value in article_data.items():
+        if isinstance(value, list):
+            article_data[key] = ", ".join(value)
+    return article_data
+
+
+def article_from_page_data(link, page_data):
+    """Normaliza la estructura extraída de una página de artículo en el diccionario 'article_data'.
+       page_data: {"title", "authors": [...], "date", "abstract", "rows": [[clave, valor], ...]}"""
+    article_data = new_article_data(link)
+    article_data["dc.title"] = (page_data.get("title") or "").strip()
+    autores = [autor.strip() for autor in page_data.get("authors") or []]
+    if autores:
+        article_data["dc.creator"] = autores[0]
+        article_data["dc.contributor"].extend(autores)
+    article_data["dc.date"] = (page_data.get("date") or "").strip()
+    article_data["dc.description.abstract"] = (page_data.get("abstract") or "").strip()[:500]
+    for key, value in page_data.get("rows") or []:
+        merge_metadata_row(article_data, key or "", value or "")
+    return finalize_article(article_data)
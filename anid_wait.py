@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException, JavascriptException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from anid_metrics import metrics
+
+# Esperas por señales concretas de la página en lugar de time.sleep fijos:
+# estabilidad de Angular (ds-app), cantidad de resultados de búsqueda o presencia de la tabla de metadata.
+# Los timeouts se adaptan a la latencia observada (p95 de una ventana móvil de esperas exitosas).
+
+POLL_FREQUENCY = 0.1
+
+# True cuando Angular no tiene tareas pendientes (HTTP, timers). Si la página no usa Angular,
+# basta con que el documento haya terminado de cargar.
+ANGULAR_STABLE_JS = """
+if (document.readyState !== "complete" && document.readyState !== "interactive") { return false; }
+if (typeof window.getAllAngularTestabilities !== "function") { return document.readyState === "complete"; }
+var testabilities = window.getAllAngularTestabilities();
+for (var i = 0; i < testabilities.length; i++) {
+    if (!testabilities[i].isStable()) { return false; }
+}
+return true;
+"""
+
+# Estado de la página de un artículo: botón 'Página completa', tabla completa o solo la cabecera
+ITEM_PAGE_STATE_JS = """
+var button = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (button) { return "button"; }
+var table = document.evaluate(arguments[1], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (table && table.querySelector("tbody tr")) { return "table"; }
+return null;
+"""
+
+TABLE_READY_JS = """
+var table = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return !!(table && table.querySelector("tbody tr"));
+"""
+
+SEARCH_RESULTS_JS = "return document.querySelectorAll(\"li[data-test='list-object']\").length;"
+
+
+class LatencyTracker:
+    """Ventana móvil de latencias observadas; el timeout sugerido es un múltiplo del p95.
+       Los timeouts no entran a la ventana (serían muestras iguales al propio timeout, que lo harían subir
+       hasta el máximo): se cuentan aparte y solo alargan la espera mientras se repiten seguidos."""
+
+    def __init__(self, name, default, minimum, maximum, factor=3.0, window=200, min_samples=5, timeout_growth=1.5):
+        self.name = name
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.min_samples = min_samples
+        self.timeout_growth = timeout_growth
+        self.timeouts = 0
+        self._consecutive_timeouts = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._consecutive_timeouts = 0
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self._consecutive_timeouts += 1
+
+    def p95(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def timeout(self):
+        with self._lock:
+            enough = len(self._samples) >= self.min_samples
+            # Si el sitio se pone lento, los timeouts seguidos alargan la espera hasta la próxima espera exitosa
+            growth = self.timeout_growth ** self._consecutive_timeouts
+        if not enough:
+            return min(self.maximum, self.default * growth)
+        return min(self.maximum, max(self.minimum, self.p95() * self.factor) * growth)
+
+
+# Latencias hasta que la página queda lista, compartidas por todos los navegadores del proceso
+item_latency = LatencyTracker("wait_item", default=15, minimum=3, maximum=40)
+search_latency = LatencyTracker("wait_search", default=20, minimum=3, maximum=40)
+table_latency = LatencyTracker("wait_table", default=10, minimum=2, maximum=40)
+
+
+def _until(driver, timeout, condition):
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY,
+                         ignored_exceptions=(JavascriptException, StaleElementReferenceException)).until(condition)
+
+
+def timed_wait(tracker, driver, condition):
+    """Espera la condición con el timeout adaptativo del tracker y registra la latencia observada."""
+    start = time.monotonic()
+    try:
+        result = _until(driver, tracker.timeout(), condition)
+    except TimeoutException:
+        metrics.incr("timeouts")
+        tracker.record_timeout()
+        raise
+    finally:
+        metrics.observe(tracker.name, time.monotonic() - start)
+    tracker.record(time.monotonic() - start)
+    return result
+
+
+def angular_stable(driver):
+    return driver.execute_script(ANGULAR_STABLE_JS)
+
+
+def wait_for_angular(driver, timeout):
+    _until(driver, timeout, angular_stable)
+
+
+def wait_for_item_page(driver, button_xpath, table_xpath):
+    """Espera a que el artículo esté listo. Devuelve 'button', 'table' o None si Angular quedó estable
+       sin botón ni tabla (se extrae lo que haya en la página)."""
+    def ready(d):
+        state = d.execute_script(ITEM_PAGE_STATE_JS, button_xpath, table_xpath)
+        if state:
+            return state
+        return "stable" if angular_stable(d) and d.find_elements(By.CSS_SELECTOR, "h2.heading") else False
+
+    state = timed_wait(item_latency, driver, ready)
+    return None if state == "stable" else state
+
+
+def wait_for_table(driver, table_xpath):
+    timed_wait(table_latency, driver, lambda d: d.execute_script(TABLE_READY_JS, table_xpath))
+
+
+def wait_for_search_results(driver):
+    """Espera a que la página de búsqueda termine de renderizar los resultados y devuelve su cantidad.
+       Una página sin resultados se considera lista cuando Angular queda estable."""
+    last_count = [-1]
+
+    def ready(d):
+        count = d.execute_script(SEARCH_RESULTS_JS)
+        stable = angular_stable(d)
+        # La cantidad debe repetirse en dos sondeos seguidos para no leer una lista a medio renderizar
+        done = stable and count == last_count[0]
+        last_count[0] = count
+        return done
+
+    try:
+        timed_wait(search_latency, driver, ready)
+    except TimeoutException:
+        if last_count[0] <= 0:
+            raise
+    return max(last_count[0], 0)
+
+
+def scroll_until_loaded(driver, max_scrolls=5):
+    """Baja hasta el final de la página mientras aparezcan resultados nuevos, esperando a Angular
+       en cada paso en lugar de una pausa fija. Devuelve la cantidad final de resultados."""
+    count = driver.execute_script(SEARCH_RESULTS_JS)
+    for _ in range(max_scrolls):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            wait_for_angular(driver, search_latency.timeout())
+        except TimeoutException:
+            break
+        new_count = driver.execute_script(SEARCH_RESULTS_JS)
+        if new_count == count:
+            break
+        count = new_count
+    return count
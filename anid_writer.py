@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+import os
+
+from anid_utils import safe_print
+from anid_metrics import metrics
+
+# Escritor de solo-anexado para articles_data.csv.
+#
+# Cada batch se anexa a un journal CSV sin cabecera (articles_data.journal.csv), en el orden de
+# columnas de un registro lateral (articles_data.schema.json). Las claves dc.* nuevas se agregan al
+# final del registro, por lo que las filas antiguas son prefijos de las nuevas y nunca hay que
+# reescribirlas. La compactación genera el CSV consolidado (y opcionalmente Parquet) a partir del journal.
+#
+# Durabilidad: el journal se sincroniza a disco (fsync) en cada batch y recién entonces el registro
+# lateral guarda el largo confirmado del journal. Al abrir, cualquier resto de un batch incompleto
+# (posterior al largo confirmado) se descarta, igual que un batch que no alcanzó a guardarse.
+
+BASE_COLUMNS = ["article_id", "URL", "dc.contributor", "dc.creator", "dc.date", "dc.description.abstract"]
+
+
+class ArticleWriter:
+
+    def __init__(self, csv_file, compact_every=20, parquet=False):
+        base, _ = os.path.splitext(csv_file)
+        self.csv_file = csv_file
+        self.journal_file = base + ".journal.csv"
+        self.schema_file = base + ".schema.json"
+        self.parquet_file = base + ".parquet"
+        self.compact_every = compact_every
+        self.parquet = parquet
+        self.columns = []
+        self.committed_bytes = 0
+        self.bytes_written = 0
+        self._batches_since_compact = 0
+        self._open()
+
+    # --- Registro de columnas ---
+
+    def _load_schema(self):
+        with open(self.schema_file, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        self.columns = schema["columns"]
+        self.committed_bytes = schema["committed_bytes"]
+
+    def _save_schema(self):
+        tmp_file = self.schema_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "committed_bytes": self.committed_bytes}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.schema_file)
+
+    def _open(self):
+        if os.path.exists(self.schema_file):
+            self._load_schema()
+            # Descartar un batch incompleto que quedó tras una interrupción
+            if os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) > self.committed_bytes:
+                safe_print("⚠️ Se descartó un batch incompleto del journal.")
+                with open(self.journal_file, "r+b") as f:
+                    f.truncate(self.committed_bytes)
+        elif os.path.exists(self.csv_file):
+            self._import_csv()
+        else:
+            self.columns = list(BASE_COLUMNS)
+            self.committed_bytes = 0
+            self._save_schema()
+
+    def _import_csv(self):
+        """Migra un articles_data.csv previo (de save_batch con pandas) al journal."""
+        with open(self.csv_file, "r", encoding="utf-8-sig", newline="") as src:
+            reader = csv.reader(src)
+            self.columns = next(reader, None) or list(BASE_COLUMNS)
+            with open(self.journal_file, "w", encoding="utf-8", newline="") as dst:
+                csv.writer(dst).writerows(reader)
+                dst.flush()
+                os.fsync(dst.fileno())
+        self.committed_bytes = os.path.getsize(self.journal_file)
+        self._save_schema()
+        safe_print(f"📁 CSV existente migrado al journal '{self.journal_file}'.")
+
+    # --- Escritura ---
+
+    def append(self, data_batch):
+        """Anexa un batch de diccionarios al journal. El costo depende solo del tamaño del batch."""
+        new_columns = [key for article in data_batch for key in article if key not in self.columns]
+        for key in dict.fromkeys(new_columns):
+            self.columns.append(key)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for article in data_batch:
+            row = [article.get(column, "") for column in self.columns]
+            # Las columnas vacías al final no se escriben: la fila queda como prefijo del registro
+            while row and row[-1] in ("", None):
+                row.pop()
+            writer.writerow(["" if value is None else value for value in row])
+        payload = buffer.getvalue().encode("utf-8")
+
+        with metrics.timer("write_batch"), open(self.journal_file, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.committed_bytes += len(payload)
+        self.bytes_written += len(payload)
+        metrics.incr("bytes_written", len(payload))
+        self._save_schema()
+
+        self._batches_since_compact += 1
+        if self.compact_every and self._batches_since_compact >= self.compact_every:
+            self.compact()
+
+    # --- Lectura ---
+
+    def iter_records(self, start=0):
+        """Recorre los registros guardados como diccionarios (columnas del registro completas),
+           opcionalmente desde una posición en bytes del journal que coincida con el inicio de un batch."""
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, "rb") as raw:
+            raw.seek(start)
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    row += [""] * (len(self.columns) - len(row))
+                    yield dict(zip(self.columns, row))
+
+    # --- Compactación ---
+
+    def compact(self):
+        """Genera el CSV consolidado (y Parquet si se pidió) a partir del journal.
+           Si una URL se anexó más de una vez (reprocesamiento o actualización), se conserva su última versión
+           en la posición de la primera, así una actualización no mueve la fila dentro del CSV."""
+        with metrics.timer("compact"):
+            return self._compact()
+
+    def _compact(self):
+        # Primera aparición de cada URL y, solo para las repetidas, su última versión
+        first_index = {}
+        latest = {}
+        for index, record in enumerate(self.iter_records()):
+            if record["URL"] in first_index:
+                latest[record["URL"]] = record
+            else:
+                first_index[record["URL"]] = index
+
+        tmp_file = self.csv_file + ".tmp"
+        count = 0
+        with open(tmp_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for index, record in enumerate(self.iter_records()):
+                if first_index[record["URL"]] != index:
+                    continue
+                record = latest.get(record["URL"], record)
+                writer.writerow([record[column] for column in self.columns])
+                count += 1
+        os.replace(tmp_file, self.csv_file)
+        self._batches_since_compact = 0
+        safe_print(f"📁 CSV consolidado: {count} registros en '{self.csv_file}'")
+
+        if self.parquet:
+            try:
+                import pandas as pd
+                pd.read_csv(self.csv_file, encoding="utf-8-sig", dtype=str).to_parquet(self.parquet_file, index=False)
+                safe_print(f"📁 Parquet generado en '{self.parquet_file}'")
+            except ImportError:
+                safe_print("⚠️ Se necesita pandas y pyarrow para generar Parquet.")
+        return count
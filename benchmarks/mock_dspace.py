@@ -0,0 +1,236 @@
+import argparse
+import html
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Servidor local que imita a repositorio.anid.cl para medir el scraper sin tocar el sitio real.
+#
+# Sirve un corpus sintético y determinista de N ítems:
+#   /search?query=...&spc.page=N[&spc.rpp=R]   -> listado con li[data-test='list-object'] (páginas desde 1)
+#   /entities/publication/{uuid}               -> página del ítem con el botón 'Página completa del artículo'
+#   /entities/publication/{uuid}/full          -> tabla de metadata dentro de ds-themed-full-item-page
+#   /server/api/discover/search/objects        -> búsqueda de la API REST (páginas desde 0)
+#   /server/api/core/items/{uuid}              -> ítem de la API REST
+#
+# La latencia y la tasa de errores (HTTP 503) son configurables. El jitter y el 503 de cada respuesta salen
+# de un random.Random propio de la petición, sembrado con (--seed, ruta, número de intento de esa ruta): la
+# misma petición recibe lo mismo en dos ejecuciones, sin importar el orden de los hilos. Al iniciar imprime
+# "listening on PUERTO" en la salida estándar, para que run_benchmark.py sepa dónde conectarse.
+
+WORDS = ("análisis", "modelo", "suelo", "araucanía", "clima", "salud", "población", "agua", "energía",
+         "bosque", "educación", "genoma", "riesgo", "volcán", "cultivo", "mapuche", "datos", "red")
+
+FIRST_NAMES = ("Ana", "Pedro", "María", "José", "Camila", "Felipe", "Valentina", "Diego", "Francisca", "Tomás")
+LAST_NAMES = ("González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda")
+
+
+def item_uuid(index):
+    return f"00000000-0000-4000-8000-{index:012d}"
+
+
+def item_index(uuid):
+    try:
+        return int(uuid.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def item_metadata(index):
+    """Metadata del ítem 'index', siempre la misma para el mismo índice."""
+    rng = random.Random(index)
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))).capitalize()
+    authors = [f"{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)}" for _ in range(rng.randint(1, 6))]
+    abstract = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))).capitalize() + "."
+    return {
+        "dc.title": [title],
+        "dc.contributor.author": authors,
+        "dc.contributor.affiliation": ["Universidad de La Frontera"],
+        "dc.date.issued": [str(rng.randint(1990, 2024))],
+        "dc.description.abstract": [abstract],
+        "dc.identifier.doi": [f"10.1234/anid.bench.{index}"],
+        "dc.subject": sorted({rng.choice(WORDS) for _ in range(rng.randint(1, 5))}),
+        "dc.type": [rng.choice(("Artículo", "Proyecto", "Tesis"))],
+        "dc.language.iso": [rng.choice(("es", "en"))],
+        "dspace.entity.type": ["Publication"],
+    }
+
+
+def item_json(index):
+    metadata = item_metadata(index)
+    return {
+        "id": item_uuid(index),
+        "uuid": item_uuid(index),
+        "name": metadata["dc.title"][0],
+        "handle": f"10533/{index}",
+        "entityType": "Publication",
+        "lastModified": f"2024-01-{index % 28 + 1:02d}T00:00:00.000+00:00",
+        "metadata": {key: [{"value": value, "language": None, "authority": None, "confidence": -1, "place": place}
+                           for place, value in enumerate(values)]
+                     for key, values in metadata.items()},
+        "type": "item",
+    }
+
+
+def _page(body):
+    return f"<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\"><title>ANID</title></head><body><ds-app>{body}</ds-app></body></html>"
+
+
+def search_html(items, page, rpp):
+    start = (page - 1) * rpp
+    rows = []
+    for index in range(max(start, 0), min(start + rpp, items)):
+        title = html.escape(item_metadata(index)["dc.title"][0])
+        rows.append(f"<li data-test=\"list-object\"><a href=\"/entities/publication/{item_uuid(index)}\">{title}</a></li>")
+    return _page(f"<ds-search><ul>{''.join(rows)}</ul></ds-search>")
+
+
+def item_html(index):
+    metadata = item_metadata(index)
+    authors = "".join(f"<span>{html.escape(author)}</span>" for author in metadata["dc.contributor.author"])
+    return _page(
+        f"<ds-item-page><h2 class=\"heading\">{html.escape(metadata['dc.title'][0])}</h2>"
+        f"<div class=\"authority\">{authors}</div>"
+        f"<div class=\"date\">{metadata['dc.date.issued'][0]}</div>"
+        f"<div class=\"abstract-text\">{html.escape(metadata['dc.description.abstract'][0])}</div>"
+        f"<a href=\"/entities/publication/{item_uuid(index)}/full\">Página completa del artículo</a></ds-item-page>")
+
+
+def full_item_html(index):
+    metadata = item_metadata(index)
+    rows = "".join(f"<tr><td>{key}</td><td>{html.escape(value)}</td><td></td></tr>"
+                   for key, values in metadata.items() for value in values)
+    return _page(
+        f"<h2 class=\"heading\">{html.escape(metadata['dc.title'][0])}</h2>"
+        f"<ds-themed-full-item-page><table><tbody>{rows}</tbody></table></ds-themed-full-item-page>")
+
+
+def search_json(items, page, size, embed):
+    start = page * size
+    objects = []
+    for index in range(max(start, 0), min(start + size, items)):
+        item = item_json(index)
+        if not embed:
+            item = {"uuid": item["uuid"], "name": item["name"], "type": "item"}
+        objects.append({"_embedded": {"indexableObject": item}})
+    total_pages = (items + size - 1) // size
+    return {"_embedded": {"searchResult": {
+        "_embedded": {"objects": objects},
+        "page": {"size": size, "totalElements": items, "totalPages": total_pages, "number": page},
+    }}}
+
+
+class MockDSpaceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _int_param(self, params, name, default):
+        try:
+            return int(params.get(name, [default])[0])
+        except ValueError:
+            return default
+
+    def _request_rng(self, config):
+        with config.lock:
+            attempt = config.attempts[self.path] = config.attempts.get(self.path, 0) + 1
+        return random.Random(f"{config.seed}:{self.path}:{attempt}")
+
+    def do_GET(self):
+        config = self.server.config
+        rng = self._request_rng(config)
+        if config.latency_ms or config.jitter_ms:
+            time.sleep((config.latency_ms + rng.uniform(0, config.jitter_ms)) / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            self._send(503, "text/plain", b"Service Unavailable")
+            return
+
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+        path = parts.path.rstrip("/")
+        segments = path.split("/")
+
+        if path == "/search":
+            page = self._int_param(params, "spc.page", 1)
+            rpp = self._int_param(params, "spc.rpp", config.page_size)
+            self._send_html(search_html(config.items, page, rpp))
+        elif path.startswith("/entities/publication/"):
+            index = item_index(segments[3])
+            if index is None or index >= config.items:
+                self._send(404, "text/plain", b"Not Found")
+            elif len(segments) > 4 and segments[4] == "full":
+                self._send_html(full_item_html(index))
+            else:
+                self._send_html(item_html(index))
+        elif path == "/server/api/discover/search/objects":
+            page = self._int_param(params, "page", 0)
+            size = self._int_param(params, "size", 20)
+            self._send_json(search_json(config.items, page, size, config.embed_metadata))
+        elif path.startswith("/server/api/core/items/"):
+            index = item_index(segments[-1])
+            if index is None or index >= config.items:
+                self._send(404, "application/json", b"{}")
+            else:
+                self._send_json(item_json(index))
+        else:
+            self._send(404, "text/plain", b"Not Found")
+
+    def _send_html(self, body):
+        self._send(200, "text/html; charset=utf-8", body.encode("utf-8"))
+
+    def _send_json(self, data):
+        self._send(200, "application/json", json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(items, port=0, page_size=10, latency_ms=0, jitter_ms=0, error_rate=0.0, embed_metadata=True,
+                  seed=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockDSpaceHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(items=items, page_size=page_size, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                                       error_rate=error_rate, embed_metadata=embed_metadata,
+                                       seed=seed, attempts={}, lock=threading.Lock())
+    return server
+
+
+def start_in_thread(*args, **kwargs):
+    """Inicia el servidor en un hilo de fondo y lo devuelve (server.server_port tiene el puerto)."""
+    server = create_server(*args, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor DSpace simulado para benchmarks del scraper")
+    parser.add_argument("--items", type=int, default=1000, help="Cantidad de ítems del corpus")
+    parser.add_argument("--port", type=int, default=0, help="Puerto (0 = uno libre)")
+    parser.add_argument("--page-size", type=int, default=10, help="Resultados por página del listado HTML sin spc.rpp")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia fija por respuesta, en milisegundos")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Latencia aleatoria adicional (0..jitter), en milisegundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas HTTP 503")
+    parser.add_argument("--no-embed", action="store_true",
+                        help="La búsqueda de la API no trae la metadata: obliga a consultar cada ítem")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del jitter y de los 503")
+    args = parser.parse_args()
+
+    server = create_server(args.items, args.port, args.page_size, args.latency_ms, args.jitter_ms,
+                           args.error_rate, not args.no_embed, args.seed)
+    print(f"listening on {server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.exit(0)
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Benchmark reproducible del scraper contra el servidor DSpace simulado (mock_dspace.py).
+#
+# Para cada tamaño de corpus levanta el servidor, ejecuta ScrapingANIDv2.py de principio a fin en un
+# directorio temporal y mide artículos/s, RSS máximo y tiempo de escritura de la salida
+# (journal + compactación, tomado de metrics.jsonl). Con psutil, el RSS es el del árbol de procesos completo
+# (scraper, chromedriver y Chrome); sin psutil, solo el del proceso del scraper. Los resultados se anexan a benchmark_results.jsonl
+# junto con el commit, y se comparan con la medición anterior de la misma configuración:
+#
+#   python benchmarks/run_benchmark.py --sizes 1000,10000,100000 --mode api
+#   python benchmarks/run_benchmark.py --sizes 1000 --mode selenium --scraper-args "--workers 4 --profile lean"
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SCRAPER = os.path.join(REPO_DIR, "ScrapingANIDv2.py")
+MOCK_SERVER = os.path.join(BENCH_DIR, "mock_dspace.py")
+RSS_SAMPLE_SECONDS = 0.25
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_mock_server(items, args):
+    command = [sys.executable, MOCK_SERVER, "--items", str(items), "--latency-ms", str(args.latency_ms),
+               "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate), "--seed", str(args.seed)]
+    if args.no_embed:
+        command.append("--no-embed")
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline()
+    if not line.startswith("listening on "):
+        server.kill()
+        raise RuntimeError("El servidor simulado no pudo iniciar")
+    return server, int(line.split()[-1])
+
+
+def sample_tree_rss(pid, stop, peak):
+    """Suma el RSS del proceso y de todos sus descendientes cada RSS_SAMPLE_SECONDS y guarda el máximo en peak[0]."""
+    try:
+        root = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    while True:
+        try:
+            processes = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass  # terminó entre la lista y la lectura
+        peak[0] = max(peak[0], total)
+        if stop.wait(RSS_SAMPLE_SECONDS):
+            return
+
+
+def run_scraper(command, workdir, log_file):
+    """Ejecuta el scraper y devuelve (código de salida, segundos, RSS máximo en MB o None, alcance del RSS).
+       El alcance es 'tree' (scraper y navegadores, con psutil) o 'process' (solo el scraper)."""
+    start = time.perf_counter()
+    with open(log_file, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+                                   env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+        if psutil is not None:
+            stop, peak = threading.Event(), [0]
+            sampler = threading.Thread(target=sample_tree_rss, args=(process.pid, stop, peak), daemon=True)
+            sampler.start()
+            process.wait()
+            stop.set()
+            sampler.join()
+            return process.returncode, time.perf_counter() - start, peak[0] / 1024 / 1024, "tree"
+        if hasattr(os, "wait4"):
+            # wait4 entrega el uso de recursos de este proceso en particular (ru_maxrss en KB en Linux)
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            peak_rss_mb = usage.ru_maxrss / 1024
+            if sys.platform == "darwin":
+                peak_rss_mb /= 1024  # en macOS ru_maxrss viene en bytes
+        else:
+            process.wait()
+            peak_rss_mb = None
+    return process.returncode, time.perf_counter() - start, peak_rss_mb, "process"
+
+
+def last_metrics(metrics_file):
+    if not os.path.exists(metrics_file):
+        return {}
+    with open(metrics_file, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else {}
+
+
+def benchmark(items, args):
+    server, port = start_mock_server(items, args)
+    workdir = tempfile.mkdtemp(prefix=f"anid-bench-{items}-")
+    try:
+        command = [sys.executable, SCRAPER, "--mode", args.mode, "--base-url", f"http://127.0.0.1:{port}",
+                   "--metrics-file", "metrics.jsonl", "--metrics-interval", "3600"]
+        command += shlex.split(args.scraper_args)
+        returncode, elapsed, peak_rss_mb, rss_scope = run_scraper(command, workdir, os.path.join(workdir, "scraper.log"))
+        snapshot = last_metrics(os.path.join(workdir, "metrics.jsonl"))
+        counters = snapshot.get("counters", {})
+        stages = snapshot.get("stages", {})
+        articles = counters.get("articles", 0)
+        write_s = sum(stages.get(stage, {}).get("total_s", 0) for stage in ("write_batch", "compact"))
+        csv_file = os.path.join(workdir, "articles_data.csv")
+        return {
+            "items": items,
+            "returncode": returncode,
+            "articles": articles,
+            "elapsed_s": round(elapsed, 2),
+            "articles_per_s": round(articles / elapsed, 2) if elapsed else 0.0,
+            "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+            "rss_scope": rss_scope,
+            "write_s": round(write_s, 3),
+            "csv_mb": round(os.path.getsize(csv_file) / 1024 / 1024, 2) if os.path.exists(csv_file) else 0.0,
+            "timeouts": counters.get("timeouts", 0),
+            "retries": counters.get("retries", 0),
+            "errors": counters.get("errors", 0),
+            "workdir": workdir if args.keep else None,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def previous_result(results_file, config, items):
+    """Última medición anterior con la misma configuración y tamaño de corpus."""
+    if not os.path.exists(results_file):
+        return None
+    previous = None
+    with open(results_file, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("config") == config and record["result"]["items"] == items:
+                previous = record
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del scraper contra un DSpace simulado local")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Tamaños de corpus separados por coma")
+    parser.add_argument("--mode", choices=["api", "selenium"], default="api", help="Modo del scraper a medir")
+    parser.add_argument("--scraper-args", default="", help="Argumentos adicionales para ScrapingANIDv2.py")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia fija del servidor simulado")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Latencia aleatoria adicional del servidor simulado")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas HTTP 503")
+    parser.add_argument("--no-embed", action="store_true", help="Búsqueda de la API sin metadata embebida")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del jitter y de los 503 del servidor simulado")
+    parser.add_argument("--results", default=os.path.join(BENCH_DIR, "benchmark_results.jsonl"),
+                        help="Archivo donde se anexan los resultados")
+    parser.add_argument("--keep", action="store_true", help="Conservar los directorios de trabajo de cada ejecución")
+    args = parser.parse_args()
+
+    config = {
+        "mode": args.mode,
+        "scraper_args": args.scraper_args,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "no_embed": args.no_embed,
+        "seed": args.seed,
+    }
+    commit = git_commit()
+    if psutil is None:
+        print("* Sin psutil, el RSS es solo el del proceso del scraper (no incluye chromedriver ni Chrome).")
+    print(f"{'ítems':>8} {'art/s':>9} {'Δ art/s':>8} {'RSS MB':>8} {'escritura s':>12} {'total s':>9} {'errores':>8}")
+    for items in [int(size) for size in args.sizes.split(",") if size.strip()]:
+        result = benchmark(items, args)
+        previous = previous_result(args.results, config, items)
+        delta = ""
+        if previous and previous["result"]["articles_per_s"]:
+            change = result["articles_per_s"] / previous["result"]["articles_per_s"] - 1
+            delta = f"{change:+.1%}"
+        rss = f"{result['peak_rss_mb']:.1f}" if result["peak_rss_mb"] is not None else "-"
+        if result["rss_scope"] == "process":
+            rss += "*"
+        print(f"{items:>8} {result['articles_per_s']:>9.1f} {delta:>8} {rss:>8} {result['write_s']:>12.2f} "
+              f"{result['elapsed_s']:>9.1f} {result['errors']:>8}")
+        if result["returncode"] != 0:
+            # Una ejecución fallida no se guarda: no sirve como referencia para la siguiente
+            print(f"   ⚠️ El scraper terminó con código {result['returncode']}"
+                  + (f" (ver {result['workdir']}/scraper.log)" if result["workdir"] else " (usar --keep para ver el log)"))
+            continue
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+                                "config": config, "result": result}, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
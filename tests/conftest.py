@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def article(article_id, url, **fields):
+    """Artículo mínimo completo (con dc.title y dc.date); 'fields' agrega o reemplaza columnas."""
+    data = {"article_id": article_id, "URL": url, "dc.title": f"Título {article_id}", "dc.date": "2020"}
+    data.update(fields)
+    return data
+
+
+@pytest.fixture
+def stand_in_server():
+    """Servidor local que responde JSON grabado: recibe {ruta: cuerpo} y devuelve la URL base.
+       Las rutas no registradas responden 404."""
+    servers = []
+
+    def start(routes):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                status, body = (200, routes[path]) if path in routes else (404, {})
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,69 @@
+import pytest
+
+from anid_api import DSpaceClient, DSpaceAPIError, item_to_article, fetch_articles, query_from_search_url
+from tests.conftest import load_fixture
+
+ITEM_UUID = "3f1c2b9a-5d47-4e8b-9c21-7a0e6b4d8f10"
+
+
+def test_item_to_article_maps_recorded_item():
+    article = item_to_article(load_fixture("item.json"), "http://127.0.0.1:8000/")
+
+    assert article["URL"] == f"http://127.0.0.1:8000/entities/publication/{ITEM_UUID}"
+    assert article["article_id"] is None
+    assert article["dc.title"] == "Dinámica de suelos volcánicos en la Araucanía"
+    assert article["dc.creator"] == "Muñoz, Camila"
+    assert article["dc.contributor"] == "Muñoz, Camila, Rojas, Pedro"
+    assert article["dc.date"] == "2019"
+    assert article["dc.description.abstract"].startswith("Se estudia la evolución")
+    assert article["dc.identifier.uri"] == "https://hdl.handle.net/10533/245871"
+    # Igual que en la tabla HTML, las claves que no son listas se quedan con el último valor
+    assert article["dc.subject"] == "Ceniza volcánica"
+    assert all(not isinstance(value, list) for value in article.values())
+
+
+def test_fetch_articles_requests_item_when_search_has_no_metadata(stand_in_server):
+    base_url = stand_in_server({
+        "/server/api/discover/search/objects": load_fixture("search.json"),
+        f"/server/api/core/items/{ITEM_UUID}": load_fixture("item.json"),
+    })
+    client = DSpaceClient(base_url)
+    try:
+        pages = list(client.iter_search(query_from_search_url(base_url + '/search?query="universidad"')))
+        assert [page for page, _ in pages] == [0]
+        articles = list(fetch_articles(client, pages[0][1], base_url))
+    finally:
+        client.close()
+
+    assert len(articles) == 1
+    url, article, error = articles[0]
+    assert error is None
+    assert article["dc.title"] == "Dinámica de suelos volcánicos en la Araucanía"
+    assert url == article["URL"] and url.endswith(f"/entities/publication/{ITEM_UUID}")
+
+
+def test_fetch_articles_reports_failed_item_and_continues(stand_in_server):
+    search = load_fixture("search.json")
+    missing = dict(search["_embedded"]["searchResult"]["_embedded"]["objects"][0]["_embedded"]["indexableObject"],
+                   uuid="00000000-0000-0000-0000-000000000000")
+    base_url = stand_in_server({f"/server/api/core/items/{ITEM_UUID}": load_fixture("item.json")})
+    client = DSpaceClient(base_url)
+    try:
+        items = [missing, {"uuid": ITEM_UUID}]
+        results = list(fetch_articles(client, items, base_url))
+    finally:
+        client.close()
+
+    assert [url.rsplit("/", 1)[-1] for url, _, _ in results] == [missing["uuid"], ITEM_UUID]
+    assert results[0][1] is None and results[0][2]
+    assert results[1][2] is None and results[1][1]["dc.title"]
+
+
+def test_client_error_carries_http_status(stand_in_server):
+    client = DSpaceClient(stand_in_server({}))
+    try:
+        with pytest.raises(DSpaceAPIError) as error:
+            client.get_item(ITEM_UUID)
+    finally:
+        client.close()
+    assert error.value.status == 404
@@ -0,0 +1,12 @@
+from anid_cache import is_complete_page
+
+
+FULL_PAGE = "<ds-themed-full-item-page><table><tr><td>dc.title</td><td>Título</td></tr></table></ds-themed-full-item-page>"
+
+
+def test_only_complete_pages_are_cacheable():
+    article = {"dc.title": "Título", "dc.date": "2020"}
+    assert is_complete_page(article, FULL_PAGE)
+    assert not is_complete_page(article, "<ds-app></ds-app>")
+    assert not is_complete_page({"dc.title": "Título", "dc.date": ""}, FULL_PAGE)
+    assert not is_complete_page({"dc.date": "2020"}, FULL_PAGE)
@@ -0,0 +1,13 @@
+from anid_fanout import DedupIndex
+
+
+def test_redundant_queries_keep_every_item_covered(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.db"), ["a", "b", "c"], capacity=100)
+    # 'b' y 'c' no tienen ítems exclusivos, pero solo uno de los dos sobra: 'x2' lo encuentran solo ellos
+    for key, queries in {"x1": [0, 1], "x2": [1, 2], "x3": [0]}.items():
+        for query_index in queries:
+            index.add(key, query_index)
+
+    assert [row["exclusive"] for row in index.overlap()] == [1, 0, 0]
+    assert index.redundant_queries() == ["c"]
+    index.close()
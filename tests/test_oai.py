@@ -0,0 +1,37 @@
+from anid_api import DSpaceClient
+from anid_oai import identifier_handle, match_granularity, record_to_article, resolve_handle_url
+from anid_utils import article_handle
+from tests.conftest import load_fixture
+
+ITEM_UUID = "3f1c2b9a-5d47-4e8b-9c21-7a0e6b4d8f10"
+
+
+def test_article_handle_from_identifier_uri_or_url():
+    assert article_handle({"dc.identifier.uri": "https://hdl.handle.net/10533/245871", "URL": "x"}) == "10533/245871"
+    assert article_handle({"URL": "https://repositorio.anid.cl/handle/10533/99"}) == "10533/99"
+    assert article_handle({"URL": f"https://repositorio.anid.cl/entities/publication/{ITEM_UUID}"}) is None
+
+
+def test_record_uses_resolved_entity_url(stand_in_server):
+    base_url = stand_in_server({"/server/api/discover/search/objects": load_fixture("search.json")})
+    client = DSpaceClient(base_url)
+    try:
+        url = resolve_handle_url(client, base_url, identifier_handle("oai:repositorio.anid.cl:10533/245871"))
+        missing = resolve_handle_url(client, base_url, "10533/1")
+    finally:
+        client.close()
+
+    assert url == f"{base_url}/entities/publication/{ITEM_UUID}"
+    assert missing is None
+    metadata = {"dc.title": [{"value": "Título"}]}
+    assert record_to_article(base_url, "oai:repositorio.anid.cl:10533/245871", metadata, url)["URL"] == url
+    assert record_to_article(base_url, "oai:repositorio.anid.cl:10533/245871", metadata)["URL"] == \
+        f"{base_url}/handle/10533/245871"
+
+
+def test_date_only_from_sets_until_to_day_granularity():
+    assert match_granularity("2024-01-01", "2026-10-17T12:30:00Z") == ("2024-01-01", "2026-10-17")
+    assert match_granularity("2024-01-01T00:00:00Z", "2026-10-17") == ("2024-01-01", "2026-10-17")
+    assert match_granularity("2024-01-01T00:00:00Z", "2026-10-17T12:30:00Z") == \
+        ("2024-01-01T00:00:00Z", "2026-10-17T12:30:00Z")
+    assert match_granularity(None, "2026-10-17T12:30:00Z") == (None, "2026-10-17T12:30:00Z")
@@ -0,0 +1,70 @@
+import pytest
+
+from anid_pool import ArticleWorkerPool, SearchPagePrefetcher
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise ConnectionError("chrome not reachable")
+        return "about:blank"
+
+    def quit(self):
+        pass
+
+
+def test_pool_without_browser_does_not_fail_articles():
+    def factory():
+        raise RuntimeError("chromedriver no encontrado")
+
+    pool = ArticleWorkerPool(2, factory, lambda driver, wait, link: {"URL": link}, restart_delay=0)
+    pool.submit("u1")
+    with pytest.raises(RuntimeError):
+        pool.next_result()
+    # El enlace no se convirtió en un error del artículo: sigue en la cola
+    assert pool.tasks.get_nowait() == "u1"
+    pool.close()
+
+
+def test_pool_retries_browser_start_and_replaces_crashed_driver():
+    starts = []
+
+    def factory():
+        starts.append(None)
+        if len(starts) == 1:
+            raise RuntimeError("session not created")
+        return FakeDriver(), None
+
+    def extract(driver, wait, link):
+        if link == "u1" and len(starts) == 2:
+            driver.alive = False
+            raise ConnectionError("chrome not reachable")
+        return {"URL": link}
+
+    pool = ArticleWorkerPool(1, factory, extract, restart_delay=0)
+    results = sorted(pool.process(["u1", "u2"]))
+    pool.close()
+
+    assert results == [("u1", {"URL": "u1"}, None), ("u2", {"URL": "u2"}, None)]
+    assert len(starts) == 3
+
+
+def test_prefetcher_error_carries_the_failing_page():
+    def fetch(driver, wait, page):
+        if page == 3:
+            raise TimeoutError("timeout")
+        return [f"link-{page}"]
+
+    prefetcher = SearchPagePrefetcher(2, lambda: (FakeDriver(), None), fetch, start_page=1)
+    pages = []
+    with pytest.raises(TimeoutError) as excinfo:
+        for page, links in prefetcher:
+            pages.append(page)
+    prefetcher.close()
+
+    assert pages == [1, 2]
+    assert excinfo.value.page == 3
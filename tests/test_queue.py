@@ -0,0 +1,100 @@
+import time
+
+from anid_queue import WorkQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    return WorkQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_initialize_seeds_known_articles_and_page_window(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.initialize([("u1", 1, "done"), ("u2", 2, "failed")], window=3)
+    # Una cola ya sembrada no se vuelve a sembrar
+    assert not queue.initialize([("u3", 3, "done")], window=3)
+
+    counts = queue.counts()
+    assert counts["pages"] == {"pending": 3}
+    assert counts["articles"] == {"done": 1, "pending": 1}
+    assert queue.claim_articles("w1", limit=10) == [("u2", 2)]
+    queue.close()
+
+
+def test_initialize_gives_articles_without_id_one_after_the_known_ones(tmp_path):
+    queue = make_queue(tmp_path)
+    # Así devuelve StateStore.articles() las filas: las de article_id NULL van primero
+    queue.initialize([("bad", None, "failed"), ("u1", 1, "done"), ("u2", 2, "done")], window=1)
+
+    assert queue.counts()["articles"] == {"done": 2, "pending": 1}
+    assert queue.claim_articles("w1", limit=10) == [("bad", 3)]
+    # Un listado que vuelve a traer u1 no lo encola de nuevo
+    queue.complete_page(queue.claim_page("w1"), "w1", ["u1"])
+    assert queue.claim_articles("w1", limit=10) == []
+    queue.close()
+
+
+def test_completed_page_enqueues_articles_and_next_window_page(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.initialize([("u1", 1, "done")], window=2)
+
+    page = queue.claim_page("w1")
+    assert page == 1
+    queue.complete_page(page, "w1", ["u1", "u2", "u3"])
+
+    # u1 ya estaba guardado; los nuevos reciben IDs a continuación de los conocidos
+    assert queue.claim_articles("w1", limit=10) == [("u2", 2), ("u3", 3)]
+    assert queue.claim_page("w1") == 2
+    assert queue.claim_page("w1") == 3
+    queue.close()
+
+
+def test_expired_lease_returns_unit_to_another_worker(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05)
+    queue.initialize([], window=1)
+    assert queue.claim_page("dead-worker") == 1
+    assert queue.claim_page("w2") is None
+
+    time.sleep(0.1)
+    assert queue.claim_page("w2") == 1
+    queue.close()
+
+
+def test_failure_after_completion_keeps_unit_done(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05, max_attempts=2)
+    queue.initialize([("u1", 1, "failed")], window=1)
+    assert queue.claim_articles("slow-worker") == [("u1", 1)]
+    time.sleep(0.1)
+    assert queue.claim_articles("w2") == [("u1", 1)]
+    queue.complete_article("u1", "w2", {"URL": "u1", "article_id": 1})
+
+    assert queue.fail_article("u1", "timeout") == "done"
+    assert queue.counts()["articles"] == {"done": 1}
+    queue.close()
+
+
+def test_article_fails_permanently_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.initialize([("u1", 1, "failed")], window=1)
+    assert queue.fail_article("u1", "error 1") == "pending"
+    assert queue.fail_article("u1", "error 2") == "failed"
+    assert queue.unmerged() == [(1, "u1", "failed", None, "error 2")]
+    queue.close()
+
+
+def test_failed_pages_stop_extending_the_window(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1, max_failed_pages=3)
+    queue.initialize([], window=2)
+
+    # Sitio caído: cada página sondeada falla
+    failed = []
+    while True:
+        page = queue.claim_page("w1")
+        if page is None:
+            break
+        assert queue.fail_page(page, "503") == "failed"
+        failed.append(page)
+
+    assert failed == [1, 2, 3, 4]
+    assert queue.finished()
+    assert queue.counts()["pages"] == {"failed": 4}
+    queue.close()
@@ -0,0 +1,30 @@
+from anid_refresh import is_modified, item_uuid_from_url, parse_timestamp
+
+UUID = "3f1c2b9a-5d47-4e8b-9c21-7a0e6b4d8f10"
+
+
+def test_item_uuid_from_url():
+    assert item_uuid_from_url(f"https://repositorio.anid.cl/entities/publication/{UUID}") == UUID
+    assert item_uuid_from_url(f"https://repositorio.anid.cl/items/{UUID}/") == UUID
+    assert item_uuid_from_url("https://repositorio.anid.cl/handle/10533/245871") is None
+    assert item_uuid_from_url(f"https://repositorio.anid.cl/entities/publication/{UUID}/full") is None
+
+
+def test_parse_timestamp_accepts_dspace_and_local_dates():
+    assert parse_timestamp("2023-08-14T15:02:11.482+00:00") == parse_timestamp("2023-08-14T15:02:11.482Z")
+    assert parse_timestamp("2023-08-14T15:02:11").tzinfo is not None
+    assert parse_timestamp("") is None
+    assert parse_timestamp("ayer") is None
+
+
+def test_is_modified_against_previous_refresh():
+    assert not is_modified("2024-01-05T12:00:00Z", "2024-01-05T12:00:00Z", None)
+    assert is_modified("2024-02-01T08:00:00Z", "2024-01-05T12:00:00Z", None)
+
+
+def test_first_refresh_only_counts_changes_after_the_row_was_saved():
+    assert is_modified("2024-02-01T08:00:00+00:00", None, "2024-01-05T12:00:00+00:00")
+    assert not is_modified("2023-08-14T15:02:11+00:00", None, "2024-01-05T12:00:00+00:00")
+    # Sin fechas comparables, el lastModified queda como línea base en vez de reescribir la fila
+    assert not is_modified("2023-08-14T15:02:11+00:00", None, None)
+    assert not is_modified("ayer", None, "2024-01-05T12:00:00+00:00")
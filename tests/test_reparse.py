@@ -0,0 +1,34 @@
+import csv
+import json
+
+from anid_reparse import reparse
+from anid_snapshots import SnapshotStore
+from anid_state import StateStore
+from anid_writer import ArticleWriter
+from tests.conftest import load_fixture
+
+
+def test_reparse_updates_snapshotted_rows_through_the_journal(tmp_path):
+    csv_file = str(tmp_path / "articles_data.csv")
+    state_db = str(tmp_path / "scraper_state.db")
+    snapshot_dir = str(tmp_path / "snapshots")
+    rows = [{"article_id": 1, "URL": "u1", "dc.title": "Sin snapshot", "dc.date": "2018"},
+            {"article_id": 2, "URL": "u2", "dc.title": "Título anterior", "dc.date": "2019"}]
+    writer = ArticleWriter(csv_file, compact_every=0)
+    writer.append(rows)
+    state = StateStore(state_db)
+    state.record_batch(rows, writer.committed_bytes)
+    state.close()
+    store = SnapshotStore(snapshot_dir)
+    store.save("u2", json.dumps(load_fixture("item.json"), ensure_ascii=False), "json")
+    store.close()
+
+    assert reparse(snapshot_dir, csv_file, state_db, workers=1) == 1
+    with open(csv_file, "r", encoding="utf-8-sig", newline="") as f:
+        saved = list(csv.DictReader(f))
+    assert [(row["article_id"], row["URL"]) for row in saved] == [("1", "u1"), ("2", "u2")]
+    assert saved[0]["dc.title"] == "Sin snapshot"
+    assert saved[1]["dc.title"] == "Dinámica de suelos volcánicos en la Araucanía"
+
+    # La base de estado quedó con la huella nueva: una segunda pasada no reescribe nada
+    assert reparse(snapshot_dir, csv_file, state_db, workers=1) == 0
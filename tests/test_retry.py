@@ -0,0 +1,30 @@
+from anid_retry import CircuitBreaker
+
+
+def open_breaker():
+    breaker = CircuitBreaker(threshold=0.5, window=4, min_samples=2, cooldown=0.0)
+    started = breaker.wait()
+    breaker.record(False, breaker.wait())
+    breaker.record(False, breaker.wait())
+    return breaker, started
+
+
+def test_late_result_does_not_count_as_the_half_open_probe():
+    breaker, started_before_open = open_breaker()
+    probe = breaker.wait()
+
+    # Una extracción que empezó antes de abrir el circuito termina bien mientras corre la prueba
+    breaker.record(True, started_before_open)
+    assert breaker._half_open
+
+    breaker.record(False, probe)
+    assert breaker._half_open
+
+
+def test_successful_probe_closes_the_circuit():
+    breaker, _ = open_breaker()
+    breaker.record(True, breaker.wait())
+    assert not breaker._half_open
+    # Cerrado, cualquier resultado vuelve a contar
+    breaker.record(False, breaker.wait())
+    assert list(breaker._results) == [False]
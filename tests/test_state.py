@@ -0,0 +1,61 @@
+import sqlite3
+
+from anid_state import StateStore
+from anid_writer import ArticleWriter
+from tests.conftest import article
+
+
+def test_checkpoint_is_written_with_the_batch(tmp_path):
+    state = StateStore(str(tmp_path / "state.db"))
+    state.record_batch([article(1, "u1")], journal_bytes=10)
+    assert state.load_checkpoint_page() == 1
+
+    state.record_batch([article(2, "u2")], journal_bytes=20, checkpoint_page=4)
+    assert state.load_checkpoint_page() == 4
+    assert state.get_meta("journal_bytes") == "20"
+    state.close()
+
+
+def test_unsaved_pending_links_are_reprocessed(tmp_path):
+    state = StateStore(str(tmp_path / "state.db"))
+    state.mark_pending(["u1", "u2", "u3", "u4"])
+    state.record_batch([article(1, "u1"), article(2, "u2", **{"dc.date": ""})], journal_bytes=10)
+    state.mark_failed("u3", "timeout")
+
+    # u2 quedó incompleto, u3 falló y u4 nunca llegó a guardarse
+    assert sorted(state.links_to_reprocess()) == ["u2", "u3", "u4"]
+    state.close()
+
+
+def test_saved_rows_are_found_by_handle(tmp_path):
+    state = StateStore(str(tmp_path / "state.db"))
+    state.record_batch([article(1, "https://x/entities/publication/abc",
+                                **{"dc.identifier.uri": "https://hdl.handle.net/10533/7"})], journal_bytes=10)
+    assert state.url_for_handle("10533/7") == "https://x/entities/publication/abc"
+    assert state.url_for_handle("10533/8") is None
+    state.close()
+
+
+def test_old_database_is_migrated_and_backfilled_from_the_journal(tmp_path):
+    writer = ArticleWriter(str(tmp_path / "articles_data.csv"), compact_every=0)
+    writer.append([article(1, "u1", **{"dc.identifier.uri": "https://hdl.handle.net/10533/7"})])
+    db_file = str(tmp_path / "state.db")
+    # Base de una versión anterior, sin las columnas fingerprint, last_modified ni handle
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+        CREATE TABLE urls (url TEXT PRIMARY KEY, status TEXT NOT NULL, article_id INTEGER,
+                           attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT,
+                           created_at TEXT NOT NULL, updated_at TEXT NOT NULL);
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO urls VALUES ('u1', 'done', 1, 1, NULL, '2024-01-01T00:00:00', '2024-01-01T00:00:00');
+    """)
+    conn.execute("INSERT INTO meta VALUES ('journal_bytes', ?)", (str(writer.committed_bytes),))
+    conn.commit()
+    conn.close()
+
+    state = StateStore(db_file)
+    state.sync_with_journal(writer)
+    assert state.url_for_handle("10533/7") == "u1"
+    assert state.refresh_candidates()[0][3] is not None
+    assert state.get_meta("backfill_pending") is None
+    state.close()
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from anid_wait import LatencyTracker
+
+
+def make_tracker():
+    tracker = LatencyTracker("wait_item", default=15, minimum=3, maximum=40)
+    for _ in range(20):
+        tracker.record(1.0)
+    return tracker
+
+
+def test_interleaved_timeouts_do_not_raise_the_estimate():
+    tracker = make_tracker()
+    for _ in range(50):
+        tracker.record_timeout()
+        for _ in range(4):
+            tracker.record(1.0)
+    # Un 20 % de esperas sin botón ni tabla no lleva el timeout al máximo
+    assert tracker.timeout() == pytest.approx(3.0)
+    assert tracker.timeouts == 50
+
+
+def test_consecutive_timeouts_stretch_the_wait_until_the_next_success():
+    tracker = make_tracker()
+    tracker.record_timeout()
+    tracker.record_timeout()
+    assert tracker.timeout() == pytest.approx(3.0 * 1.5 ** 2)
+    for _ in range(20):
+        tracker.record_timeout()
+    assert tracker.timeout() == 40
+
+    tracker.record(1.0)
+    assert tracker.timeout() == pytest.approx(3.0)
@@ -0,0 +1,47 @@
+import csv
+
+from anid_writer import ArticleWriter
+from tests.conftest import article
+
+
+def read_csv(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_compact_keeps_last_version_in_first_position(tmp_path):
+    writer = ArticleWriter(str(tmp_path / "articles_data.csv"), compact_every=0)
+    writer.append([article(1, "u1"), article(2, "u2"), article(3, "u3")])
+    writer.append([article(2, "u2", **{"dc.title": "Título corregido"})])
+
+    assert writer.compact() == 3
+    rows = read_csv(writer.csv_file)
+    assert [row["URL"] for row in rows] == ["u1", "u2", "u3"]
+    assert rows[1]["dc.title"] == "Título corregido"
+
+
+def test_new_columns_are_appended_to_the_schema(tmp_path):
+    writer = ArticleWriter(str(tmp_path / "articles_data.csv"), compact_every=0)
+    writer.append([article(1, "u1")])
+    writer.append([article(2, "u2", **{"dc.subject": "Suelos"})])
+
+    records = list(ArticleWriter(writer.csv_file, compact_every=0).iter_records())
+    assert writer.columns[-1] == "dc.subject"
+    assert records[0]["dc.subject"] == ""
+    assert records[1]["dc.subject"] == "Suelos"
+
+
+def test_torn_batch_is_discarded_on_reopen(tmp_path):
+    writer = ArticleWriter(str(tmp_path / "articles_data.csv"), compact_every=0)
+    writer.append([article(1, "u1"), article(2, "u2")])
+    committed = writer.committed_bytes
+    # Un batch que se cortó a medio escribir, sin llegar a confirmarse en el registro lateral
+    with open(writer.journal_file, "ab") as f:
+        f.write(b'3,u3,"sin cerrar')
+
+    reopened = ArticleWriter(writer.csv_file, compact_every=0)
+    assert reopened.committed_bytes == committed
+    assert [record["URL"] for record in reopened.iter_records()] == ["u1", "u2"]
+
+    reopened.append([article(3, "u3")])
+    assert [record["URL"] for record in reopened.iter_records()] == ["u1", "u2", "u3"]